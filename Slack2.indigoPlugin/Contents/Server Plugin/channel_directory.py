@@ -0,0 +1,141 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import time
+from threading import Event, Lock, Thread
+
+from slack_sdk.errors import SlackApiError
+
+
+class ChannelDirectory:
+    """
+    All the public and private channels of one Slack Workspace.
+
+    The list is persisted to a small JSON file so it's available immediately when the plugin starts,
+    refreshed in the background every `ttl` seconds, and kept current in between from channel events.
+    """
+
+    CHANNEL_EVENTS = (
+        'channel_created', 'channel_rename', 'channel_archive', 'channel_unarchive', 'channel_deleted',
+        'group_rename', 'group_archive', 'group_unarchive', 'group_deleted',
+    )
+    PAGE_SIZE = 1000
+
+    def __init__(self, name, client, logger, cache_path, ttl=3600):
+        self.name = name
+        self.client = client
+        self.logger = logger
+        self.cache_path = cache_path
+        self.ttl = ttl
+
+        self._lock = Lock()
+        self._channels = {}         # channel id -> [name, archived]
+        self._menu = []             # cached (id, name) list for the UI, rebuilt on change
+        self.fetched_at = 0
+        self._stop = Event()
+        self._refresh_requested = Event()
+        self._thread = Thread(target=self._refresh_loop, name=f"{name} channel directory", daemon=True)
+
+    def start(self):
+        self._load_cache()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._refresh_requested.set()
+
+    def channel_list(self):
+        return self._menu
+
+    def channel_name(self, channel_id):
+        entry = self._channels.get(channel_id)
+        return entry[0] if entry else None
+
+    def request_refresh(self):
+        self._refresh_requested.set()
+
+    def refresh(self):
+        channels = {}
+        response = self.client.conversations_list(limit=self.PAGE_SIZE, types="public_channel,private_channel", exclude_archived=True)
+        # the next pages are fetched while this one is processed
+        for channel in response.iter_items('channels', prefetch=2):
+            channels[channel['id']] = [channel['name'], 0]
+        with self._lock:
+            self._channels = channels
+            self.fetched_at = time.time()
+            self._update()
+        self.logger.info(f"{self.name}: Channel List Updated, {len(channels)} channels")
+
+    def apply_event(self, event):
+        event_type = event['type']
+        channel = event.get('channel')
+        channel_id = channel['id'] if isinstance(channel, dict) else channel
+        with self._lock:
+            if event_type in ('channel_created', 'channel_rename', 'group_rename'):
+                archived = self._channels.get(channel_id, [None, 0])[1]
+                self._channels[channel_id] = [channel['name'], archived]
+            elif event_type in ('channel_archive', 'group_archive'):
+                if channel_id in self._channels:
+                    self._channels[channel_id][1] = 1
+            elif event_type in ('channel_unarchive', 'group_unarchive'):
+                if channel_id not in self._channels:
+                    # we never saw this one, get the name with the next refresh
+                    self._refresh_requested.set()
+                    return
+                self._channels[channel_id][1] = 0
+            elif event_type in ('channel_deleted', 'group_deleted'):
+                self._channels.pop(channel_id, None)
+            self._update()
+        self.logger.debug(f"{self.name}: {event_type} applied to channel {channel_id}")
+
+    # called with self._lock held
+    def _update(self):
+        self._menu = self._build_menu()
+        self._save_cache()
+
+    def _build_menu(self):
+        return sorted(((cid, entry[0]) for cid, entry in self._channels.items() if not entry[1]), key=lambda item: item[1])
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path) as cache_file:
+                cache = json.load(cache_file)
+            with self._lock:
+                self._channels = cache['channels']
+                self.fetched_at = cache['fetched_at']
+                self._menu = self._build_menu()
+            self.logger.debug(f"{self.name}: Loaded {len(self._channels)} channels from cache")
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError, TypeError) as err:
+            self.logger.warning(f"{self.name}: Ignoring unreadable channel cache {self.cache_path}: {err}")
+
+    def _save_cache(self):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "w") as cache_file:
+                json.dump({'fetched_at': self.fetched_at, 'channels': self._channels}, cache_file, separators=(',', ':'))
+            os.replace(tmp_path, self.cache_path)
+        except OSError as err:
+            self.logger.warning(f"{self.name}: Unable to save channel cache {self.cache_path}: {err}")
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            wait = self.fetched_at + self.ttl - time.time()
+            if wait > 0:
+                self._refresh_requested.wait(wait)
+            if self._stop.is_set():
+                break
+            self._refresh_requested.clear()
+            try:
+                self.refresh()
+            except SlackApiError as err:
+                self.logger.error(f"{self.name}: Channel list refresh failed: {err.response['error']}")
+                self._stop.wait(60)
+            except Exception as err:
+                self.logger.error(f"{self.name}: Channel list refresh failed: {err}")
+                self._stop.wait(60)
@@ -0,0 +1,56 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class EventDeduplicator:
+    """
+    Remembers recently seen Slack event_ids, per team, to drop redelivered events.
+
+    Slack redelivers events it considers unacknowledged, with the same event_id. Each team keeps
+    an LRU of at most `max_size` event_ids, entries not seen for `ttl` seconds are evicted.
+    """
+
+    def __init__(self, ttl=600, max_size=5000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = Lock()
+        self._seen = {}         # team_id -> OrderedDict(event_id -> last seen time), oldest first
+        self._hits = {}         # team_id -> duplicates dropped
+        self._misses = {}       # team_id -> new events
+
+    def check_and_mark(self, team_id, event_id):
+        """Returns True if the event_id has been seen already, otherwise remembers it, in one step."""
+        if not event_id:
+            return False
+        now = time.time()
+        with self._lock:
+            seen = self._seen.get(team_id)
+            if seen is None:
+                seen = self._seen[team_id] = OrderedDict()
+            if event_id in seen:
+                seen.move_to_end(event_id)
+                seen[event_id] = now
+                self._hits[team_id] = self._hits.get(team_id, 0) + 1
+                return True
+            seen[event_id] = now
+            self._misses[team_id] = self._misses.get(team_id, 0) + 1
+            while seen and (len(seen) > self.max_size or now - next(iter(seen.values())) > self.ttl):
+                seen.popitem(last=False)
+            return False
+
+    def forget(self, team_id, event_id):
+        # an event that could not be processed, so that its redelivery is not dropped
+        if not event_id:
+            return
+        with self._lock:
+            seen = self._seen.get(team_id)
+            if seen is not None and seen.pop(event_id, None) is not None:
+                self._misses[team_id] -= 1
+
+    def stats(self, team_id):
+        with self._lock:
+            return self._hits.get(team_id, 0), self._misses.get(team_id, 0)
@@ -0,0 +1,76 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+from queue import Queue, Full
+from threading import Thread
+
+
+class EventPipeline:
+    """
+    Background processing stage for incoming Slack events.
+
+    The webhook (or Socket Mode) handler submits an event and acknowledges it to Slack right away,
+    the state updates and triggers run later on one of `workers` threads. Events for the same
+    device and channel always go to the same worker, so they are processed in the order received.
+    """
+
+    def __init__(self, handler, logger, workers=2, max_queue_size=1000, stats_callback=None):
+        self.handler = handler
+        self.logger = logger
+        self.stats_callback = stats_callback
+        workers = max(1, workers)
+        self._queues = [Queue(maxsize=max(1, max_queue_size // workers)) for _ in range(workers)]
+        self._workers = [Thread(target=self._worker, args=(queue,), name=f"Slack event worker {i}", daemon=True)
+                         for i, queue in enumerate(self._queues)]
+        self.dropped_count = 0
+
+    def start(self):
+        for worker in self._workers:
+            worker.start()
+        return self
+
+    def stop(self):
+        for queue in self._queues:
+            try:
+                queue.put(None, timeout=1.0)
+            except Full:
+                pass
+        for worker in self._workers:
+            worker.join(5.0)
+
+    def submit(self, devId, event):
+        channel = event.get('channel')
+        if isinstance(channel, dict):      # channel_created, channel_rename, ...
+            channel = channel.get('id')
+        queue = self._queues[hash((devId, channel)) % len(self._queues)]
+        try:
+            queue.put_nowait((devId, event, time.time()))
+            return True
+        except Full:
+            self.dropped_count += 1
+            self.logger.error(f"Event queue full, dropped {event.get('type')} event ({self.dropped_count} dropped so far)")
+            return False
+
+    def queue_depth(self):
+        return sum(queue.qsize() for queue in self._queues)
+
+    def _worker(self, queue):
+        while True:
+            item = queue.get()
+            if item is None:
+                return
+            devId, event, received_at = item
+            started_at = time.time()
+            try:
+                self.handler(devId, event)
+            except Exception as err:
+                self.logger.exception(f"Error processing {event.get('type')} event: {err}")
+            processing_latency = time.time() - started_at
+            queue_latency = started_at - received_at
+            self.logger.debug(f"{event.get('type')} event queued {queue_latency:.3f} sec, processed in {processing_latency:.3f} sec")
+            if self.stats_callback:
+                try:
+                    self.stats_callback(devId, queue_latency, processing_latency)
+                except Exception as err:
+                    self.logger.debug(f"Event stats update failed: {err}")
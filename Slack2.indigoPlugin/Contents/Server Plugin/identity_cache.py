@@ -0,0 +1,150 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import time
+from collections import OrderedDict
+from threading import Condition, Thread
+
+from slack_sdk.errors import SlackApiError
+
+
+class IdentityCache:
+    """
+    Display names of the users in one Slack Workspace, so events can be labeled without a Web API call.
+
+    The cache is warmed with users.list when started and kept current from user_change/team_join events.
+    Lookups never block: a miss returns None and the user id is queued for a background lookup. A few misses are
+    looked up with users.info; more than `INFO_LOOKUPS` at once are filled from users.list pages instead.
+    Entries are evicted least recently used beyond `max_size`, and refreshed after `ttl` seconds.
+    Users that could not be looked up are remembered as unknown for `negative_ttl` seconds.
+    """
+
+    USER_EVENTS = ('user_change', 'team_join')
+    PAGE_SIZE = 1000
+    INFO_LOOKUPS = 5
+
+    def __init__(self, name, client, logger, ttl=86400, max_size=10000, negative_ttl=300):
+        self.name = name
+        self.client = client
+        self.logger = logger
+        self.ttl = ttl
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+
+        self._cond = Condition()
+        self._users = OrderedDict()     # user id -> (display name or None, expires at), least recently used first
+        self._misses = set()            # user ids waiting for a lookup
+        self._stopped = False
+        self._thread = Thread(target=self._fill_loop, name=f"{name} identity cache", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def display_name(self, user_id):
+        now = time.time()
+        with self._cond:
+            entry = self._users.get(user_id)
+            if entry is not None:
+                self._users.move_to_end(user_id)
+                if now < entry[1]:
+                    return entry[0]
+            # missing or stale, look it up in the background
+            if user_id not in self._misses:
+                self._misses.add(user_id)
+                self._cond.notify()
+            return entry[0] if entry else None
+
+    def apply_event(self, event):
+        self._store([event['user']])
+        self.logger.debug(f"{self.name}: {event['type']} updated user {event['user'].get('id')}")
+
+    def warm(self):
+        count = 0
+        for user in self.client.users_list(limit=self.PAGE_SIZE).iter_items('members', prefetch=2):
+            self._store([user])
+            count += 1
+        self.logger.debug(f"{self.name}: Identity cache loaded {count} users")
+
+    @staticmethod
+    def user_display_name(user):
+        profile = user.get('profile', {})
+        return profile.get('display_name') or profile.get('real_name') or user.get('real_name') or user.get('name') or user['id']
+
+    def _store(self, users, unknown_ids=()):
+        now = time.time()
+        with self._cond:
+            for user in users:
+                self._users[user['id']] = (self.user_display_name(user), now + self.ttl)
+                self._users.move_to_end(user['id'])
+                self._misses.discard(user['id'])
+            for user_id in unknown_ids:
+                # not looked up again for a while, so events from deleted or unknown users don't each cost a users.info call
+                self._users[user_id] = (None, now + self.negative_ttl)
+                self._users.move_to_end(user_id)
+                self._misses.discard(user_id)
+            while len(self._users) > self.max_size:
+                self._users.popitem(last=False)
+
+    def _fill_loop(self):
+        try:
+            self.warm()
+        except SlackApiError as err:
+            self.logger.error(f"{self.name}: Unable to load user list: {err.response['error']}")
+        except Exception as err:
+            self.logger.error(f"{self.name}: Unable to load user list: {err}")
+
+        while True:
+            with self._cond:
+                while not self._misses and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                missing = set(self._misses)
+                self._misses.clear()
+
+            if len(missing) > self.INFO_LOOKUPS:
+                missing = self._list_users(missing)
+            if len(missing) > self.INFO_LOOKUPS:
+                # not in the workspace's user list, e.g. deleted users or users of other workspaces
+                self.logger.debug(f"{self.name}: {len(missing)} users not found in users.list")
+                self._store([], missing)
+            else:
+                self._info_users(missing)
+
+    def _list_users(self, user_ids):
+        """
+        Stores users.list pages until all of user_ids have been seen, and returns the ids that were not.
+        """
+        missing = set(user_ids)
+        try:
+            for user in self.client.users_list(limit=self.PAGE_SIZE).iter_items('members', prefetch=2):
+                self._store([user])
+                missing.discard(user['id'])
+                if not missing:
+                    break
+        except SlackApiError as err:
+            self.logger.debug(f"{self.name}: users.list failed: {err.response['error']}")
+        except Exception as err:
+            self.logger.warning(f"{self.name}: users.list failed: {err}")
+        return missing
+
+    def _info_users(self, user_ids):
+        users = []
+        unknown_ids = []
+        for user_id in user_ids:
+            try:
+                users.append(self.client.users_info(user=user_id)['user'])
+            except SlackApiError as err:
+                self.logger.debug(f"{self.name}: users.info failed for {user_id}: {err.response['error']}")
+                unknown_ids.append(user_id)
+            except Exception as err:
+                # network errors and the like; keep filling the other misses
+                self.logger.warning(f"{self.name}: users.info failed for {user_id}: {err}")
+                unknown_ids.append(user_id)
+        self._store(users, unknown_ids)
@@ -0,0 +1,137 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Condition, Thread
+
+from slack_sdk.errors import SlackApiError
+
+
+class OutboxMessage:
+
+    def __init__(self, channel, text, files):
+        self.channel = channel
+        self.text = text
+        self.files = files
+        self.enqueued_at = time.time()
+
+
+class Outbox:
+    """
+    Outbound message queue for one Slack Workspace device.
+
+    Actions enqueue messages and return at once, a fixed pool of worker threads sends them.
+    Messages for the same channel are sent in order, different channels are sent in parallel.
+    """
+
+    def __init__(self, name, client, logger, workers=2, upload_workers=3, max_queue_size=500, stats_callback=None):
+        self.name = name
+        self.client = client
+        self.logger = logger
+        self.max_queue_size = max_queue_size
+        self.stats_callback = stats_callback
+
+        self._cond = Condition()
+        self._pending = {}          # channel -> deque of OutboxMessage, present while the channel has work
+        self._ready = deque()       # channels with queued messages and no worker busy on them
+        self._queued = 0
+        self._in_flight = 0
+        self._stopped = False
+        self.last_drain_latency = 0.0
+
+        # attachments of a message are uploaded in parallel, shared by all the workers to bound the total
+        self._uploads = ThreadPoolExecutor(max_workers=max(1, upload_workers), thread_name_prefix=f"{name} upload")
+        self._workers = [Thread(target=self._worker, name=f"{name} outbox {i}", daemon=True) for i in range(max(1, workers))]
+
+    def start(self):
+        for worker in self._workers:
+            worker.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        with self._cond:
+            self._stopped = True
+            dropped = self._queued
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join(timeout)
+        self._uploads.shutdown(wait=False)
+        if dropped:
+            self.logger.warning(f"{self.name}: Outbox stopped, {dropped} unsent message(s) discarded")
+
+    def enqueue(self, channel, text, files=None):
+        with self._cond:
+            if self._stopped:
+                self.logger.error(f"{self.name}: Outbox is stopped, message to {channel} not sent")
+                return False
+            if self._queued >= self.max_queue_size:
+                self.logger.error(f"{self.name}: Outbox full ({self._queued} messages), message to {channel} not sent")
+                return False
+            queue = self._pending.get(channel)
+            if queue is None:
+                queue = self._pending[channel] = deque()
+                self._ready.append(channel)
+                self._cond.notify()
+            queue.append(OutboxMessage(channel, text, files or []))
+            self._queued += 1
+        self._report()
+        return True
+
+    def stats(self):
+        with self._cond:
+            return self._queued, self._in_flight, self.last_drain_latency
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                channel = self._ready.popleft()
+                message = self._pending[channel].popleft()
+                self._queued -= 1
+                self._in_flight += 1
+            self._report()
+
+            try:
+                self._send(message)
+            except SlackApiError as err:
+                self.logger.error(f"{self.name}: Error sending message to {message.channel}: {err.response['error']}")
+            except Exception as err:
+                self.logger.error(f"{self.name}: Error sending message to {message.channel}: {err}")
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self.last_drain_latency = time.time() - message.enqueued_at
+                    if self._pending[channel]:
+                        self._ready.append(channel)
+                        self._cond.notify()
+                    else:
+                        del self._pending[channel]
+                self._report()
+
+    def _send(self, message):
+        self.client.chat_postMessage(channel=message.channel, text=message.text)
+        if not message.files:
+            return
+        uploads = [self._uploads.submit(self.client.files_upload, channels=message.channel, file=path, title=os.path.basename(path))
+                   for path in message.files]
+        # the message is done, and the next one for this channel can go, once all its files are uploaded
+        wait(uploads)
+        for path, upload in zip(message.files, uploads):
+            err = upload.exception()
+            if isinstance(err, SlackApiError):
+                self.logger.error(f"{self.name}: Error uploading {path} to {message.channel}: {err.response['error']}")
+            elif err:
+                self.logger.error(f"{self.name}: Error uploading {path} to {message.channel}: {err}")
+
+    def _report(self):
+        if self.stats_callback:
+            try:
+                self.stats_callback(*self.stats())
+            except Exception as err:
+                self.logger.debug(f"{self.name}: Outbox stats update failed: {err}")
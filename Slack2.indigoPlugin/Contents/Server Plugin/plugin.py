@@ -4,14 +4,32 @@
 import logging
 import json
 import os
+import time
+from functools import partial
 
 from slack_sdk import WebClient
 from slack_sdk.errors import SlackApiError
-
-from threading import Thread
+from slack_sdk.http_retry import all_builtin_retry_handlers
+from slack_sdk.socket_mode import SocketModeClient
+from slack_sdk.socket_mode.builtin import Reactor
+from slack_sdk.socket_mode.dispatcher import channel_partition_key
+from slack_sdk.socket_mode.response import SocketModeResponse
+from slack_sdk.web.connection_pool import ConnectionPool
+from slack_sdk.web.rate_limiter import RateLimiter
+from slack_sdk.web.response_cache import ResponseCache
+
+from channel_directory import ChannelDirectory
+from event_dedup import EventDeduplicator
+from event_pipeline import EventPipeline
+from identity_cache import IdentityCache
+from outbox import Outbox
+
+from threading import Lock, Thread
 
 class Plugin(indigo.PluginBase):
 
+    EVENT_STATS_INTERVAL = 5.0     # seconds between event latency state updates
+
     def __init__(self, pluginId, pluginDisplayName, pluginVersion, pluginPrefs):
         indigo.PluginBase.__init__(self, pluginId, pluginDisplayName, pluginVersion, pluginPrefs)
         self.debug = True
@@ -23,27 +41,56 @@ class Plugin(indigo.PluginBase):
         self.logger.debug(f"LogLevel = {self.logLevel}")
 
         self.slack_accounts = {}
-        self.channels = {}
+        self.slack_teams = {}
+        self.slack_clients = {}
+        self.outboxes = {}
+        self.channel_directories = {}
+        self.socket_clients = {}
+        self.socket_sessions = {}   # device id -> session id of the last Socket Mode connection reported
+        self.identity_caches = {}
         self.triggers = {}
+        self.trigger_index = {}     # (slackDevice id, channel id, trigger type) -> frozenset of trigger ids, replaced on change
+        self.event_dedup = EventDeduplicator()
+        self.event_stats_lock = Lock()
+        self.pending_event_stats = {}   # device id -> (queue latency, processing latency) of the last event, not yet shown
+        self.event_pipeline = EventPipeline(self.process_event, self.logger, workers=int(pluginPrefs.get("event_workers", 2)),
+                                            stats_callback=self.event_stats)
+        # all the Socket Mode connections are received on one I/O thread
+        self.socket_reactor = Reactor(logger=logging.getLogger(f"{self.logger.name}.SocketMode"))
 
     def startup(self):
         self.logger.debug("Slack 2 startup")
+        self.event_pipeline.start()
+        self.socket_reactor.start()
 
         # Test here to see if Reflector webhook is available, get reflector name, etc.
         reflectorURL = indigo.server.getReflectorURL()
         if not reflectorURL:
-            self.logger.warning("Unable to set up Slack webhooks - no reflector configured")
+            self.logger.warning("Unable to set up Slack webhooks - no reflector configured, use Socket Mode to receive events")
             return
 
         reflector_api_key = self.pluginPrefs.get("reflector_api_key", None)
         if not reflector_api_key:
-            self.logger.warning("Unable to set up Slack webhooks - no reflector API key")
+            self.logger.warning("Unable to set up Slack webhooks - no reflector API key, use Socket Mode to receive events")
             return
 
         self.logger.info(f"Reflector OK, this is your webhook URI for Slack dashboard: {reflectorURL}/message/{self.pluginId}/webhook?api_key={reflector_api_key}")
 
+    def runConcurrentThread(self):
+        try:
+            while True:
+                self.sleep(self.EVENT_STATS_INTERVAL)
+                try:
+                    self.flush_event_stats()
+                except Exception as err:
+                    self.logger.debug(f"Event stats update failed: {err}")
+        except self.StopThread:
+            pass
+
     def shutdown(self):
         self.logger.debug("Slack 2 shutdown")
+        self.event_pipeline.stop()
+        self.socket_reactor.close()
 
     def closedPrefsConfigUi(self, valuesDict, userCancelled):
         if not userCancelled:
@@ -54,20 +101,76 @@ class Plugin(indigo.PluginBase):
     def deviceStartComm(self, device):
         self.logger.debug(f"{device.name}: Starting Device")
 
-        client = WebClient(token=device.pluginProps['bot_token'])
+        # one long-lived client per workspace, so keep-alive connections, rate limits and cached lookups are shared
+        # across calls; responses are only parsed when read, as most sends only check "ok"
+        client = WebClient(token=device.pluginProps['bot_token'],
+                           connection_pool=ConnectionPool(logger=self.logger),
+                           rate_limiter=RateLimiter(logger=self.logger),
+                           response_cache=ResponseCache(logger=self.logger),
+                           retry_handlers=all_builtin_retry_handlers(),
+                           lazy_response=True)
+        self.slack_clients[device.id] = client
+        self.outboxes[device.id] = Outbox(device.name, client, self.logger,
+                                          workers=int(device.pluginProps.get('outbox_workers', 2)),
+                                          upload_workers=int(device.pluginProps.get('upload_workers', 3)),
+                                          stats_callback=partial(self.outbox_stats, device.id)).start()
         auth_info = client.auth_test()
         self.slack_accounts[auth_info['team_id']] = device.id
+        self.slack_teams[device.id] = auth_info['team_id']
         self.logger.info(f"{device.name}: Connected to Slack Workspace '{auth_info['team']}'")
 
-        self.channels[device.id] = [
-            (channel["id"], channel["name"])
-            for channel in client.conversations_list()['channels']
-        ]
-        self.logger.info("{}: Channel List Updated".format(device.name))
-        self.logger.debug("{}: Channels: {}".format(device.name, self.channels[device.id]))
+        cache_path = os.path.join(indigo.server.getInstallFolderPath(), "Preferences", "Plugins", self.pluginId, f"channels-{auth_info['team_id']}.json")
+        self.channel_directories[device.id] = ChannelDirectory(device.name, client, self.logger, cache_path).start()
+        self.identity_caches[device.id] = IdentityCache(device.name, client, self.logger).start()
+        self.logger.debug(f"{device.name}: Channels: {self.channel_directories[device.id].channel_list()}")
+
+        if device.pluginProps.get('connection_mode', 'reflector') == 'socket':
+            # events are pushed over a WebSocket instead of coming through the reflector
+            socket_client = SocketModeClient(app_token=device.pluginProps['app_token'], web_client=client,
+                                             logger=logging.getLogger(f"{self.logger.name}.SocketMode"),
+                                             compression_enabled=device.pluginProps.get('socket_compression', False),
+                                             standby_enabled=device.pluginProps.get('socket_standby', False),
+                                             reactor=self.socket_reactor, direct_dispatch=True,
+                                             auto_acknowledge=True, partition_key=channel_partition_key)
+            socket_client.socket_mode_request_listeners.append(partial(self.socket_mode_handler, device.id))
+            socket_client.on_message_listeners.append(partial(self.socket_message_listener, device.id, socket_client))
+            socket_client.connect()
+            self.socket_clients[device.id] = socket_client
+            self.logger.info(f"{device.name}: Receiving events using Socket Mode")
+            device.updateStateOnServer('status', "Socket Mode")
+        else:
+            device.updateStateOnServer('status', "Reflector")
 
     def deviceStopComm(self, device):
         self.logger.debug(f"{device.name}: Stopping Device")
+        socket_client = self.socket_clients.pop(device.id, None)
+        self.socket_sessions.pop(device.id, None)
+        if socket_client:
+            socket_client.close()
+            self.logger.debug(f"{device.name}: Socket Mode dispatch latencies: {socket_client.dispatch_stats.to_dict()}")
+            self.logger.debug(f"{device.name}: Socket Mode dispatch lanes: {socket_client.dispatcher.lane_stats()}")
+        directory = self.channel_directories.pop(device.id, None)
+        if directory:
+            directory.stop()
+        identities = self.identity_caches.pop(device.id, None)
+        if identities:
+            identities.stop()
+        outbox = self.outboxes.pop(device.id, None)
+        if outbox:
+            outbox.stop()
+        client = self.slack_clients.pop(device.id, None)
+        if client:
+            client.connection_pool.close()
+            self.logger.debug(f"{device.name}: Web API response cache: {client.response_cache.stats()}")
+
+    def outbox_stats(self, devId, queue_depth, in_flight, drain_latency):
+        device = indigo.devices[devId]
+        key_value_list = [
+            {'key': 'outbox_queue_depth', 'value': queue_depth},
+            {'key': 'outbox_in_flight', 'value': in_flight},
+            {'key': 'outbox_drain_latency', 'value': round(drain_latency, 3), 'uiValue': f"{drain_latency:.3f} sec"}
+        ]
+        device.updateStatesOnServer(key_value_list)
 
     def reflector_handler(self, action, dev=None, callerWaitingForResult=None):
         request_body = json.loads(action.props['request_body'])
@@ -77,18 +180,98 @@ class Plugin(indigo.PluginBase):
             return json.dumps({'challenge': request_body['challenge']})
 
         elif request_body['type'] == 'event_callback':
-            devId = self.slack_accounts[request_body["team_id"]]
-            device = indigo.devices[devId]
-            return self.handle_event(device, request_body['event'])
+            # acknowledge now, Slack retries deliveries that take longer than 3 seconds
+            devId = self.slack_accounts.get(request_body.get("team_id"))
+            if not devId or 'event' not in request_body:
+                self.logger.warning(f"reflector_handler: Ignoring event for unknown workspace {request_body.get('team_id')}")
+                return "200"
+            headers = {key.lower(): value for key, value in (action.props.get('headers') or {}).items()}
+            if self.event_dedup.check_and_mark(request_body["team_id"], request_body.get("event_id")):
+                self.logger.debug(f"reflector_handler: Dropped duplicate delivery of event {request_body.get('event_id')} "
+                                  f"(retry attempt {headers.get('x-slack-retry-num')}, reason {headers.get('x-slack-retry-reason')})")
+                return "200"
+            if not self.event_pipeline.submit(devId, request_body['event']):
+                self.event_dedup.forget(request_body["team_id"], request_body.get("event_id"))
+                # not acknowledged, so that Slack delivers it again later; a bare string would be the content of a 200 reply
+                self.logger.warning(f"reflector_handler: Event queue full, asking Slack to retry event {request_body.get('event_id')}")
+                return {'status': 503, 'headers': {'Retry-After': "5", 'Content-Type': "text/plain"}, 'content': "Event queue full"}
+            return "200"
 
         else:
             self.logger.debug(f"reflector_handler: Unimplemented message type: {request_body['type']}")
             return "200"
 
+    def socket_mode_handler(self, devId, client, req):
+        # Slack redelivers envelopes that aren't acknowledged within 3 seconds,
+        # events_api envelopes have already been acknowledged on receipt (auto_acknowledge)
+        client.send_socket_mode_response(SocketModeResponse(envelope_id=req.envelope_id))
+        self.logger.threaddebug(f"socket mode request: {json.dumps(req.payload, indent=4, sort_keys=True)}")
+
+        if req.type == "events_api":
+            if self.event_dedup.check_and_mark(req.payload.get('team_id'), req.payload.get('event_id')):
+                self.logger.debug(f"socket_mode_handler: Dropped duplicate delivery of event {req.payload.get('event_id')} "
+                                  f"(retry attempt {req.retry_attempt}, reason {req.retry_reason})")
+                return
+            if not self.event_pipeline.submit(devId, req.payload['event']):
+                self.event_dedup.forget(req.payload.get('team_id'), req.payload.get('event_id'))
+                # already acknowledged, Slack won't deliver it again
+                self.logger.error(f"socket_mode_handler: Event queue full, lost event {req.payload.get('event_id')}")
+                return
+        else:
+            self.logger.debug(f"socket_mode_handler: Unimplemented request type: {req.type}")
+
+    def socket_message_listener(self, devId, client, message):
+        # the first message on each new connection (Slack's hello) tells how long (re)connecting took,
+        # unless the client switched over to a standby connection that was already receiving
+        session = client.current_session
+        if session is None or session.first_message_latency is None or self.socket_sessions.get(devId) == session.session_id:
+            return
+        self.socket_sessions[devId] = session.session_id
+        latency = client.last_reconnect_gap if client.standby_enabled and client.last_reconnect_gap is not None else session.first_message_latency
+        self.logger.debug(f"socket_message_listener: Connected to Slack in {latency:.3f} sec (session id: {session.session_id})")
+        indigo.devices[devId].updateStateOnServer('socket_reconnect_latency', value=round(latency, 3), uiValue=f"{latency:.3f} sec")
+
+    def process_event(self, devId, event):
+        self.handle_event(indigo.devices[devId], event)
+
+    def event_stats(self, devId, queue_latency, processing_latency):
+        # called for every event on the pipeline's workers; the states are updated by flush_event_stats
+        with self.event_stats_lock:
+            self.pending_event_stats[devId] = (queue_latency, processing_latency)
+
+    def flush_event_stats(self):
+        with self.event_stats_lock:
+            pending, self.pending_event_stats = self.pending_event_stats, {}
+        for devId, (queue_latency, processing_latency) in pending.items():
+            if devId not in indigo.devices:
+                continue
+            key_value_list = [
+                {'key': 'event_queue_latency', 'value': round(queue_latency, 3), 'uiValue': f"{queue_latency:.3f} sec"},
+                {'key': 'event_processing_latency', 'value': round(processing_latency, 3), 'uiValue': f"{processing_latency:.3f} sec"}
+            ]
+            duplicates, unique = self.event_dedup.stats(self.slack_teams.get(devId))
+            key_value_list.append({'key': 'duplicate_events', 'value': duplicates})
+            key_value_list.append({'key': 'unique_events', 'value': unique})
+            indigo.devices[devId].updateStatesOnServer(key_value_list)
+
     def handle_event(self, device, event):
 
+        # users.info, conversations.info and the like are fetched again after a change
+        self.slack_clients[device.id].response_cache.invalidate_for_event(event)
+
+        if event['type'] in ChannelDirectory.CHANNEL_EVENTS:
+            self.channel_directories[device.id].apply_event(event)
+            return "200"
+
+        if event['type'] in IdentityCache.USER_EVENTS:
+            self.identity_caches[device.id].apply_event(event)
+            return "200"
+
         user = event.get('user', None)
-        if not user and (event.get('subtype', None) == "bot_message"):
+        user_name = None
+        if user:
+            user_name = self.identity_caches[device.id].display_name(user)
+        elif event.get('subtype', None) == "bot_message":
             user = event.get('username', None)
         if not user:
             user = "--Unknown--"
@@ -98,23 +281,21 @@ class Plugin(indigo.PluginBase):
             {'key': 'last_event_channel', 'value': event['channel']},
             {'key': 'last_event_channel_type', 'value': event['channel_type']},
             {'key': 'last_event_user', 'value': user},
+            {'key': 'last_event_user_name', 'value': user_name or user},
             {'key': 'last_event_text', 'value': event['text']}
         ]
+        if 'event_ts' in event:
+            # time from the event happening in Slack until its triggers run here
+            latency = time.time() - float(event['event_ts'])
+            key_value_list.append({'key': 'last_event_latency', 'value': round(latency, 3), 'uiValue': f"{latency:.3f} sec"})
         device.updateStatesOnServer(key_value_list)
         self.logger.debug(f"{device.name}: {event['type']} event in channel {event['channel']} handled")
 
         # Now do any triggers
-        for triggerId in self.triggers:
-            trigger = indigo.triggers[triggerId]
-            self.logger.debug("{}: Testing Event Trigger".format(trigger.name))
-            if trigger.pluginProps["slackDevice"] == str(device.id):
-
-                if trigger.pluginTypeId == "messageEvent":
-                    if event['channel'] == trigger.pluginProps['slackChannel']:
-                        indigo.trigger.execute(trigger)
-
-                else:
-                    self.logger.error(f"{trigger.name}: Unknown Trigger Type {trigger.pluginTypeId}")
+        # only the triggers for this device and channel; the frozensets are replaced, not modified, when triggers are edited
+        for triggerId in self.trigger_index.get((str(device.id), event['channel'], "messageEvent"), ()):
+            self.logger.debug(f"Executing Event Trigger {triggerId}")
+            indigo.trigger.execute(triggerId)
 
         return "200"
 
@@ -122,9 +303,9 @@ class Plugin(indigo.PluginBase):
         self.logger.debug(f"get_channel_list, targetId={targetId}, typeId={typeId}, valuesDict = {valuesDict}")
         slackDevice = indigo.devices.get(int(valuesDict.get('slackDevice', 0)), None)
         if typeId == 'send':
-            return self.channels[targetId]
+            return self.channel_directories[targetId].channel_list()
         elif typeId == 'messageEvent' and slackDevice:
-            return self.channels[slackDevice.id]
+            return self.channel_directories[slackDevice.id].channel_list()
         else:
             return []
 
@@ -140,12 +321,43 @@ class Plugin(indigo.PluginBase):
         self.logger.debug(f"{trigger.name}: Adding Trigger")
         assert trigger.id not in self.triggers
         self.triggers[trigger.id] = trigger
+        self.index_trigger(trigger)
 
     def triggerStopProcessing(self, trigger):
         self.logger.debug(f"{trigger.name}: Removing Trigger")
         assert trigger.id in self.triggers
+        self.unindex_trigger(self.triggers[trigger.id])
         del self.triggers[trigger.id]
 
+    def triggerUpdated(self, origTrigger, newTrigger):
+        # the base class restarts the trigger when its props change, which re-indexes it
+        indigo.PluginBase.triggerUpdated(self, origTrigger, newTrigger)
+        if newTrigger.id in self.triggers:
+            self.unindex_trigger(self.triggers[newTrigger.id])
+            self.triggers[newTrigger.id] = newTrigger
+            self.index_trigger(newTrigger)
+
+    @staticmethod
+    def trigger_key(trigger):
+        return trigger.pluginProps.get("slackDevice"), trigger.pluginProps.get("slackChannel"), trigger.pluginTypeId
+
+    def index_trigger(self, trigger):
+        if trigger.pluginTypeId != "messageEvent":
+            self.logger.error(f"{trigger.name}: Unknown Trigger Type {trigger.pluginTypeId}")
+            return
+        key = self.trigger_key(trigger)
+        self.trigger_index[key] = self.trigger_index.get(key, frozenset()) | {trigger.id}
+
+    def unindex_trigger(self, trigger):
+        key = self.trigger_key(trigger)
+        triggerIds = self.trigger_index.get(key)
+        if triggerIds:
+            triggerIds = triggerIds - {trigger.id}
+            if triggerIds:
+                self.trigger_index[key] = triggerIds
+            else:
+                del self.trigger_index[key]
+
     # helper functions
 
     def prepareTextValue(self, strInput):
@@ -155,18 +367,15 @@ class Plugin(indigo.PluginBase):
 
     # actions go here
     def sendMessage(self, pluginAction, slackDevice, callerWaitingForResult):
-        
+
+        # substitutions are done now, the message itself is sent later by the device's outbox workers
         msgText = self.prepareTextValue(pluginAction.props['msgBody'])
         channel = pluginAction.props['channel']
 
-        client = WebClient(token=slackDevice.pluginProps['bot_token'])
-        client.chat_postMessage(channel=channel, text=msgText)
-
+        fileList = []
         attach = pluginAction.props.get("attachments", "")
         if len(attach) > 0:
             files = indigo.activePlugin.substitute(attach)
-            fileList = files.split(",")
-            for file in fileList:
-                path = os.path.expanduser(file)
-                name = os.path.basename(path)
-                client.files_upload(channels=channel, file=path, title=name)
+            fileList = [os.path.expanduser(file) for file in files.split(",")]
+
+        self.outboxes[slackDevice.id].enqueue(channel, msgText, fileList)
@@ -0,0 +1,112 @@
+"""JSON encoding and decoding for the Web API, Socket Mode and RTM clients
+
+A faster codec is used when one is installed (orjson, then ujson), otherwise the
+standard library json module. Set the SLACK_SDK_JSON_CODEC env variable to "json",
+"orjson" or "ujson" to choose one, or call set_json_codec() with your own.
+
+    from slack_sdk import json_codec
+    data = json_codec.loads(body_bytes)
+
+"""
+import json
+import logging
+import os
+from typing import Any, Optional, Union
+
+_default_logger = logging.getLogger(__name__)
+
+
+class JsonCodec:
+    """The standard library json module"""
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> str:
+        return json.dumps(obj)
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        """Decodes a JSON document.
+
+        Args:
+            data: The document, either text or UTF-8 encoded bytes (no need to decode them first)
+
+        Raises:
+            ValueError: If the document is not valid JSON.
+        """
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps(self, obj: Any) -> str:
+        try:
+            return self._orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            # e.g. integers larger than 64 bits, or dict keys other than str
+            return json.dumps(obj)
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        return self._orjson.loads(data)
+
+
+class UjsonCodec(JsonCodec):
+    name = "ujson"
+
+    def __init__(self):
+        import ujson
+
+        self._ujson = ujson
+
+    def dumps(self, obj: Any) -> str:
+        return self._ujson.dumps(obj, escape_forward_slashes=False)
+
+    def loads(self, data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        if isinstance(data, (bytearray, memoryview)):
+            data = bytes(data)
+        return self._ujson.loads(data)
+
+
+_CODECS = {"orjson": OrjsonCodec, "ujson": UjsonCodec, "json": JsonCodec}
+
+
+def _detect_json_codec(
+    name: Optional[str] = None, logger: logging.Logger = _default_logger
+) -> JsonCodec:
+    names = [name] if name in _CODECS else ["orjson", "ujson", "json"]
+    for codec_name in names:
+        try:
+            codec = _CODECS[codec_name]()
+            logger.debug(f"Using the {codec.name} JSON codec")
+            return codec
+        except ImportError:
+            continue
+    return JsonCodec()
+
+
+_codec: JsonCodec = _detect_json_codec(os.environ.get("SLACK_SDK_JSON_CODEC"))
+
+
+def get_json_codec() -> JsonCodec:
+    return _codec
+
+
+def set_json_codec(codec: JsonCodec) -> None:
+    """Replaces the codec used by all the clients."""
+    global _codec
+    _codec = codec
+
+
+def dumps(obj: Any) -> str:
+    return _codec.dumps(obj)
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+    return _codec.loads(data)
@@ -1,6 +1,5 @@
 """A Python module for interacting with Slack's RTM API."""
 import inspect
-import json
 import logging
 import time
 from concurrent.futures.thread import ThreadPoolExecutor
@@ -8,11 +7,14 @@ from logging import Logger
 from queue import Queue, Empty
 from ssl import SSLContext
 from threading import Lock, Event
-from typing import Optional, Callable, List, Union
+from typing import Optional, Callable, List, Union, Any
 
+from slack_sdk import json_codec
 from slack_sdk.errors import SlackApiError, SlackClientError
 from slack_sdk.proxy_env_variable_loader import load_http_proxy_from_env
 from slack_sdk.socket_mode.builtin.connection import Connection, ConnectionState
+from slack_sdk.socket_mode.builtin.reactor import Reactor
+from slack_sdk.socket_mode.dispatcher import PartitionedDispatcher
 from slack_sdk.socket_mode.interval_runner import IntervalRunner
 from slack_sdk.web import WebClient
 
@@ -27,10 +29,13 @@ class RTMClient:
     timeout: int
     base_url: str
     ping_interval: int
+    compression_enabled: bool
     logger: Logger
     web_client: WebClient
 
     current_session: Optional[Connection]
+    current_session_runner: Optional[IntervalRunner]
+    reactor: Optional[Reactor]
     current_session_state: Optional[ConnectionState]
     wss_uri: Optional[str]
 
@@ -38,6 +43,9 @@ class RTMClient:
     message_listeners: List[Callable[["RTMClient", dict], None]]
     message_processor: IntervalRunner
     message_workers: ThreadPoolExecutor
+    # set to process messages with the same partition_key in order
+    dispatcher: Optional[PartitionedDispatcher]
+    partition_key: Optional[Callable[[dict], Any]]
 
     closed: bool
     connect_operation_lock: Lock
@@ -66,6 +74,9 @@ class RTMClient:
         trace_enabled: bool = False,
         all_message_trace_enabled: bool = False,
         ping_pong_trace_enabled: bool = False,
+        compression_enabled: bool = False,
+        reactor: Optional[Reactor] = None,
+        partition_key: Optional[Callable[[dict], Any]] = None,
     ):
         self.token = token.strip() if token is not None else None
         self.bot_id = None
@@ -102,6 +113,7 @@ class RTMClient:
         self.trace_enabled = trace_enabled
         self.all_message_trace_enabled = all_message_trace_enabled
         self.ping_pong_trace_enabled = ping_pong_trace_enabled
+        self.compression_enabled = compression_enabled
 
         self.message_queue = Queue()
 
@@ -116,9 +128,12 @@ class RTMClient:
 
         self.current_session = None
         self.current_session_state = ConnectionState()
-        self.current_session_runner = IntervalRunner(
-            self._run_current_session, 0.1
-        ).start()
+        self.reactor = reactor
+        self.current_session_runner = (
+            IntervalRunner(self._run_current_session, 0.1).start()
+            if self.reactor is None
+            else None
+        )
         self.wss_uri = None
 
         self.current_app_monitor_started = False
@@ -132,6 +147,17 @@ class RTMClient:
 
         self.message_processor = IntervalRunner(self.process_messages, 0.001).start()
         self.message_workers = ThreadPoolExecutor(max_workers=concurrency)
+        # e.g. slack_sdk.socket_mode.dispatcher.channel_partition_key
+        self.partition_key = partition_key
+        self.dispatcher = (
+            PartitionedDispatcher(
+                workers=concurrency,
+                logger=self.logger,
+                thread_name_prefix="RTM worker",
+            )
+            if partition_key is not None
+            else None
+        )
 
     # --------------------------------------------------------------
     # Decorator to register listeners
@@ -233,6 +259,7 @@ class RTMClient:
             all_message_trace_enabled=self.all_message_trace_enabled,
             ping_pong_trace_enabled=self.ping_pong_trace_enabled,
             receive_buffer_size=1024,
+            compression_enabled=self.compression_enabled,
             proxy=self.proxy,
             on_message_listener=self.run_all_message_listeners,
             on_error_listener=self.run_all_error_listeners,
@@ -244,10 +271,14 @@ class RTMClient:
         if old_current_session_state is not None:
             old_current_session_state.terminated = True
         if old_session is not None:
+            if self.reactor is not None:
+                self.reactor.unregister(old_session)
             old_session.close()
 
         self.current_session = current_session
         self.current_session_state = ConnectionState()
+        if self.reactor is not None and current_session.is_active():
+            self.reactor.register(current_session, self.current_session_state)
         self.auto_reconnect_enabled = self.default_auto_reconnect_enabled
 
         if not self.current_app_monitor_started:
@@ -260,6 +291,8 @@ class RTMClient:
 
     def disconnect(self):
         """Disconnects the current session."""
+        if self.reactor is not None:
+            self.reactor.unregister(self.current_session)
         self.current_session.disconnect()
 
     def close(self) -> None:
@@ -270,6 +303,8 @@ class RTMClient:
         self.closed = True
         self.disconnect()
         self.current_session.close()
+        if self.dispatcher is not None:
+            self.dispatcher.shutdown()
 
     def start(self) -> None:
         """Establishes an RTM connection and blocks the current thread."""
@@ -286,7 +321,7 @@ class RTMClient:
         if isinstance(payload, str):
             self.current_session.send(payload)
         else:
-            self.current_session.send(json.dumps(payload))
+            self.current_session.send(json_codec.dumps(payload))
 
     # --------------------------------------------------------------
     # WS Message Processor
@@ -310,15 +345,28 @@ class RTMClient:
             if raw_message is not None:
                 message: dict = {}
                 if raw_message.startswith("{"):
-                    message = json.loads(raw_message)
+                    message = json_codec.loads(raw_message)
 
                 def _run_message_listeners():
                     self.run_message_listeners(message)
 
-                self.message_workers.submit(_run_message_listeners)
+                if self.dispatcher is not None:
+                    self.dispatcher.submit(
+                        self._partition_key_of(message), _run_message_listeners
+                    )
+                else:
+                    self.message_workers.submit(_run_message_listeners)
         except Empty:
             pass
 
+    def _partition_key_of(self, message: dict) -> Any:
+        try:
+            return self.partition_key(message)
+        except Exception as e:
+            # all such messages go to the same lane
+            self.logger.exception(f"Failed to get the partition key of a message: {e}")
+            return None
+
     def process_messages(self) -> None:
         while not self.closed:
             try:
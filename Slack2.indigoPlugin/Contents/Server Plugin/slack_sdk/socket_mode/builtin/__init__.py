@@ -1 +1,2 @@
 from .client import SocketModeClient  # noqa
+from .reactor import Reactor  # noqa
@@ -5,13 +5,22 @@
 
 """
 import logging
+import time
+from collections import OrderedDict
 from concurrent.futures.thread import ThreadPoolExecutor
+from functools import partial
 from logging import Logger
 from queue import Queue
 from threading import Lock
-from typing import Union, Optional, List, Callable, Dict
+from typing import Union, Optional, List, Callable, Dict, Any
 
+from slack_sdk import json_codec
 from slack_sdk.socket_mode.client import BaseSocketModeClient
+from slack_sdk.socket_mode.dispatcher import (
+    DispatchStats,
+    PartitionedDispatcher,
+    channel_partition_key,
+)
 from slack_sdk.socket_mode.listeners import (
     WebSocketMessageListener,
     SocketModeRequestListener,
@@ -19,6 +28,7 @@ from slack_sdk.socket_mode.listeners import (
 from slack_sdk.socket_mode.request import SocketModeRequest
 from slack_sdk.web import WebClient
 from .connection import Connection, ConnectionState
+from .reactor import Reactor
 from ..interval_runner import IntervalRunner
 from ...errors import SlackClientConfigurationError, SlackClientNotConnectedError
 from ...proxy_env_variable_loader import load_http_proxy_from_env
@@ -45,18 +55,29 @@ class SocketModeClient(BaseSocketModeClient):
 
     current_session: Optional[Connection]
     current_session_state: ConnectionState
-    current_session_runner: IntervalRunner
+    current_session_runner: Optional[IntervalRunner]
+    reactor: Optional[Reactor]
+
+    # a second connection kept open to switch over to when reconnecting
+    standby_enabled: bool
+    standby_session: Optional[Connection]
+    standby_session_state: ConnectionState
+    standby_session_runner: Optional[IntervalRunner]
+    # the seconds no connection was receiving during the last switch to a new connection
+    last_reconnect_gap: Optional[float]
 
     current_app_monitor: IntervalRunner
     current_app_monitor_started: bool
 
-    message_processor: IntervalRunner
+    message_processor: Optional[IntervalRunner]
     message_workers: ThreadPoolExecutor
 
     auto_reconnect_enabled: bool
     default_auto_reconnect_enabled: bool
     trace_enabled: bool
     receive_buffer_size: int  # bytes size
+    max_message_size: int  # bytes size
+    compression_enabled: bool
 
     connect_operation_lock: Lock
 
@@ -75,6 +96,14 @@ class SocketModeClient(BaseSocketModeClient):
         ping_pong_trace_enabled: bool = False,
         ping_interval: float = 5,
         receive_buffer_size: int = 1024,
+        max_message_size: int = 16 * 1024 * 1024,
+        compression_enabled: bool = False,
+        reactor: Optional[Reactor] = None,
+        direct_dispatch: bool = False,
+        dispatch_queue_size: int = 1000,
+        auto_acknowledge: bool = False,
+        partition_key: Optional[Callable[[dict], Any]] = None,
+        standby_enabled: bool = False,
         concurrency: int = 10,
         proxy: Optional[str] = None,
         proxy_headers: Optional[Dict[str, str]] = None,
@@ -94,6 +123,21 @@ class SocketModeClient(BaseSocketModeClient):
             ping_pong_trace_enabled: True if trace logging for all ping-pong communications is enabled (default: False)
             ping_interval: interval for ping-pong with Slack servers (seconds)
             receive_buffer_size: the chunk size of a single socket recv operation (default: 1024)
+            max_message_size: the largest message to receive, larger ones are skipped (default: 16 MB)
+            compression_enabled: True if permessage-deflate compression is offered to the server (default: False)
+            reactor: the Reactor to receive messages on, instead of a thread of this client
+            direct_dispatch: True if messages are parsed where received and handed straight to
+                `concurrency` workers, instead of going through message_queue (default: False)
+            dispatch_queue_size: the number of messages the workers queue; with direct_dispatch, messages beyond
+                that are not acknowledged (auto_acknowledge), so that Slack delivers them again, instead of
+                blocking the receiving thread
+            auto_acknowledge: True if events_api envelopes are acknowledged as soon as they are received,
+                and redeliveries of them are skipped (default: False)
+            partition_key: the function returning the key of a message (e.g. its channel); messages with
+                the same key are processed in order, by one of `concurrency` workers
+                (default: channel_partition_key with direct_dispatch, otherwise no ordering)
+            standby_enabled: True if a second connection is kept open, which receives messages too,
+                so that reconnecting switches over to it without a gap (default: False)
             concurrency: the size of thread pool (default: 10)
             proxy: the HTTP proxy URL
             proxy_headers: additional HTTP header for proxy connection
@@ -115,6 +159,8 @@ class SocketModeClient(BaseSocketModeClient):
             raise SlackClientConfigurationError(
                 "Too small receive_buffer_size detected."
             )
+        self.max_message_size = max_message_size
+        self.compression_enabled = compression_enabled
 
         self.wss_uri = None
         self.message_queue = Queue()
@@ -123,9 +169,27 @@ class SocketModeClient(BaseSocketModeClient):
 
         self.current_session = None
         self.current_session_state = ConnectionState()
-        self.current_session_runner = IntervalRunner(
-            self._run_current_session, 0.1
-        ).start()
+        self.reactor = reactor
+        self.standby_enabled = standby_enabled
+        self.standby_session = None
+        self.standby_session_state = ConnectionState()
+        self.last_reconnect_gap = None
+        self._standby_opening = False
+        self._standby_opening_lock = Lock()
+        # the connections a runner thread is receiving on, as a standby keeps its runner when promoted
+        self._running_sessions = set()
+        self._running_sessions_lock = Lock()
+
+        self.current_session_runner = (
+            IntervalRunner(self._run_current_session, 0.1).start()
+            if self.reactor is None
+            else None
+        )
+        self.standby_session_runner = (
+            IntervalRunner(self._run_current_session, 0.1).start()
+            if self.standby_enabled and self.reactor is None
+            else None
+        )
 
         self.current_app_monitor_started = False
         self.current_app_monitor = IntervalRunner(
@@ -135,8 +199,26 @@ class SocketModeClient(BaseSocketModeClient):
         self.closed = False
         self.connect_operation_lock = Lock()
 
-        self.message_processor = IntervalRunner(self.process_messages, 0.001).start()
+        if direct_dispatch or partition_key is not None:
+            self.dispatcher = PartitionedDispatcher(
+                workers=concurrency,
+                max_queue_size=dispatch_queue_size,
+                # the receiving thread (possibly a reactor shared by many connections) never waits
+                put_timeout=0 if direct_dispatch else 10,
+                logger=self.logger,
+            )
+            self.partition_key = partition_key or channel_partition_key
+        if direct_dispatch:
+            self.dispatch_stats = DispatchStats()
+            self.dispatched_envelopes = {}
+            self.message_processor = None
+        else:
+            self.message_processor = IntervalRunner(self.process_messages, 0.001).start()
         self.message_workers = ThreadPoolExecutor(max_workers=concurrency)
+        self.auto_acknowledge = auto_acknowledge
+        self.acknowledged_envelopes = OrderedDict()
+        self.acknowledged_events = OrderedDict()
+        self.acknowledged_envelopes_lock = Lock()
 
         self.proxy = proxy
         if self.proxy is None or len(self.proxy.strip()) == 0:
@@ -164,29 +246,20 @@ class SocketModeClient(BaseSocketModeClient):
         if self.wss_uri is None:
             self.wss_uri = self.issue_new_wss_url()
 
-        current_session = Connection(
-            url=self.wss_uri,
-            logger=self.logger,
-            ping_interval=self.ping_interval,
-            trace_enabled=self.trace_enabled,
-            all_message_trace_enabled=self.all_message_trace_enabled,
-            ping_pong_trace_enabled=self.ping_pong_trace_enabled,
-            receive_buffer_size=self.receive_buffer_size,
-            proxy=self.proxy,
-            proxy_headers=self.proxy_headers,
-            on_message_listener=self._on_message,
-            on_error_listener=self._on_error,
-            on_close_listener=self._on_close,
-        )
+        current_session = self._new_session(self.wss_uri)
         current_session.connect()
 
         if old_current_session_state is not None:
             old_current_session_state.terminated = True
         if old_session is not None:
+            if self.reactor is not None:
+                self.reactor.unregister(old_session)
             old_session.close()
 
         self.current_session = current_session
         self.current_session_state = ConnectionState()
+        if self.reactor is not None and current_session.is_active():
+            self.reactor.register(current_session, self.current_session_state)
         self.auto_reconnect_enabled = self.default_auto_reconnect_enabled
 
         if not self.current_app_monitor_started:
@@ -196,9 +269,139 @@ class SocketModeClient(BaseSocketModeClient):
         self.logger.info(
             f"A new session has been established (session id: {self.session_id()})"
         )
+        if self.standby_enabled and self.standby_session is None:
+            self.message_workers.submit(self._open_standby_session)
+
+    def connect_to_new_endpoint(self, force: bool = False):
+        old_session = self.current_session
+        started_at = time.perf_counter()
+        if not (self.standby_enabled and self._switch_to_standby_session(force)):
+            super().connect_to_new_endpoint(force)
+        if self.current_session is not old_session:
+            self.last_reconnect_gap = time.perf_counter() - started_at
+            self.logger.info(
+                f"Switched to a new connection in {self.last_reconnect_gap:.3f} seconds"
+                f" (session id: {self.session_id()})"
+            )
+
+    def _new_session(self, url: str) -> Connection:
+        session = Connection(
+            url=url,
+            logger=self.logger,
+            ping_interval=self.ping_interval,
+            trace_enabled=self.trace_enabled,
+            all_message_trace_enabled=self.all_message_trace_enabled,
+            ping_pong_trace_enabled=self.ping_pong_trace_enabled,
+            receive_buffer_size=self.receive_buffer_size,
+            max_message_size=self.max_message_size,
+            compression_enabled=self.compression_enabled,
+            proxy=self.proxy,
+            proxy_headers=self.proxy_headers,
+            on_error_listener=self._on_error,
+            on_close_listener=self._on_close,
+        )
+        # messages are timed with the receive time of the connection they came on
+        session.on_message_listener = partial(self._on_message, session=session)
+        return session
+
+    def _switch_to_standby_session(self, force: bool) -> bool:
+        """Makes the standby connection the current one, if it is open.
+
+        The standby has been receiving all along, so the switch itself causes no gap in
+        the events. A new standby connection is then opened in the background.
+        """
+        if not self.connect_operation_lock.acquire(blocking=True, timeout=5):
+            return False
+        try:
+            standby_session = self.standby_session
+            if not (force or not self.is_connected()):
+                # another thread has already reconnected
+                return True
+            if standby_session is None or not standby_session.is_active():
+                return False
+            old_session, old_session_state = self.current_session, self.current_session_state
+            self.current_session = standby_session
+            self.current_session_state = self.standby_session_state
+            self.standby_session = None
+            self.standby_session_state = ConnectionState()
+            old_session_state.terminated = True
+            if old_session is not None and self.reactor is not None:
+                self.reactor.unregister(old_session)
+            self.auto_reconnect_enabled = self.default_auto_reconnect_enabled
+        finally:
+            self.connect_operation_lock.release()
+        if old_session is not None:
+            # closing waits for a receive in progress on it, up to its receive_timeout
+            self.message_workers.submit(old_session.close)
+        self.message_workers.submit(self._open_standby_session)
+        return True
+
+    def _open_standby_session(self) -> None:
+        # both the monitor and the reconnecting threads ask for a new standby
+        with self._standby_opening_lock:
+            if self.closed or self._standby_opening:
+                return
+            self._standby_opening = True
+        try:
+            session = self._new_session(self.issue_new_wss_url())
+            session.on_message_listener = partial(self._on_standby_message, session)
+            session.on_close_listener = partial(self._on_standby_close, session)
+            session.connect()
+            if self.closed:
+                session.close()
+                return
+            # not while the current standby is being made the current session
+            with self.connect_operation_lock:
+                old_session, old_session_state = self.standby_session, self.standby_session_state
+                self.standby_session = session
+                self.standby_session_state = ConnectionState()
+                if self.reactor is not None and session.is_active():
+                    self.reactor.register(session, self.standby_session_state)
+            if old_session is not None:
+                old_session_state.terminated = True
+                if self.reactor is not None:
+                    self.reactor.unregister(old_session)
+                old_session.close()
+            self.logger.info(
+                f"A standby session has been established (session id: {session.session_id})"
+            )
+        except Exception as e:
+            self.logger.error(
+                f"Failed to open a standby connection (error: {type(e).__name__}, message: {e})"
+            )
+        finally:
+            with self._standby_opening_lock:
+                self._standby_opening = False
+        self._standby_opening_lock = Lock()
+
+    def _replace_standby_session(self, session: Optional[Connection]) -> None:
+        if session is not self.standby_session:
+            # already replaced, or made the current one
+            return
+        # the old one is closed once the new one is open
+        self._open_standby_session()
+
+    def _on_standby_message(self, session: Connection, message: str):
+        if session is not self.current_session and '"disconnect"' in message:
+            if json_codec.loads(message).get("type") == "disconnect":
+                # Slack is about to close the standby connection, not the current one
+                self.logger.info(
+                    f"Replacing the standby connection (session id: {session.session_id})"
+                )
+                self.message_workers.submit(self._replace_standby_session, session)
+                return
+        self._on_message(message, session)
+
+    def _on_standby_close(self, session: Connection, code: int, reason: Optional[str] = None):
+        if session is self.current_session:
+            self._on_close(code, reason)
+        elif session is self.standby_session and not self.closed:
+            self.message_workers.submit(self._replace_standby_session, session)
 
     def disconnect(self) -> None:
         if self.current_session is not None:
+            if self.reactor is not None:
+                self.reactor.unregister(self.current_session)
             self.current_session.close()
 
     def send_message(self, message: str) -> None:
@@ -232,16 +435,32 @@ class SocketModeClient(BaseSocketModeClient):
         self.closed = True
         self.auto_reconnect_enabled = False
         self.disconnect()
+        if self.standby_session is not None:
+            self.standby_session_state.terminated = True
+            if self.reactor is not None:
+                self.reactor.unregister(self.standby_session)
+            self.standby_session.close()
+        if self.standby_session_runner is not None and self.standby_session_runner.is_alive():
+            # it may be running the current session, if that used to be the standby one
+            self.current_session_state.terminated = True
+            self.standby_session_runner.shutdown()
         if self.current_app_monitor.is_alive():
             self.current_app_monitor.shutdown()
-        if self.message_processor.is_alive():
+        if self.message_processor is not None and self.message_processor.is_alive():
             self.message_processor.shutdown()
+        if self.dispatcher is not None:
+            self.dispatcher.shutdown()
         self.message_workers.shutdown()
 
-    def _on_message(self, message: str):
+    def _on_message(self, message: str, session: Optional[Connection] = None):
         if self.logger.level <= logging.DEBUG:
             self.logger.debug(f"on_message invoked: (message: {message})")
-        self.enqueue_message(message)
+        if self.dispatcher is not None:
+            # the connection it came on, which may be the standby one
+            session = session or self.current_session
+            self.dispatch_message(message, session.last_received_at if session else None)
+        else:
+            self.enqueue_message(message)
         for listener in self.on_message_listeners:
             listener(message)
 
@@ -266,15 +485,25 @@ class SocketModeClient(BaseSocketModeClient):
             listener(code, reason)
 
     def _run_current_session(self):
-        if self.current_session is not None and self.current_session.is_active():
-            session_id = self.session_id()
+        # With a standby connection, there are two runners. The runner receiving on the standby keeps
+        # receiving on it once it is made the current one, so each runner takes whichever is not run.
+        if not self._run_session(self.current_session, self.current_session_state) and self.standby_enabled:
+            self._run_session(self.standby_session, self.standby_session_state)
+
+    def _run_session(self, session: Optional[Connection], state: ConnectionState) -> bool:
+        if session is not None and session.is_active():
+            with self._running_sessions_lock:
+                if session in self._running_sessions:
+                    return False
+                self._running_sessions.add(session)
+            session_id = session.session_id
             try:
                 self.logger.info(
                     "Starting to receive messages from a new connection"
                     f" (session id: {session_id})"
                 )
-                self.current_session_state.terminated = False
-                self.current_session.run_until_completion(self.current_session_state)
+                state.terminated = False
+                session.run_until_completion(state)
                 self.logger.info(
                     "Stopped receiving messages from a connection"
                     f" (session id: {session_id})"
@@ -284,6 +513,11 @@ class SocketModeClient(BaseSocketModeClient):
                     "Failed to start or stop the current session"
                     f" (session id: {session_id}, error: {e})"
                 )
+            finally:
+                with self._running_sessions_lock:
+                    self._running_sessions.discard(session)
+            return True
+        return False
 
     def _monitor_current_session(self):
         if self.current_app_monitor_started:
@@ -298,6 +532,13 @@ class SocketModeClient(BaseSocketModeClient):
                         f"(session id: {self.session_id()})"
                     )
                     self.connect_to_new_endpoint()
+
+                if self.standby_enabled and not self.closed:
+                    standby_session = self.standby_session
+                    if standby_session is not None:
+                        standby_session.check_state()
+                    if standby_session is None or not standby_session.is_active():
+                        self.message_workers.submit(self._replace_standby_session, standby_session)
             except Exception as e:
                 self.logger.error(
                     "Failed to check the current session or reconnect to the server "
@@ -1,3 +1,4 @@
+import select
 import socket
 import ssl
 import struct
@@ -10,6 +11,8 @@ from uuid import uuid4
 
 from slack_sdk.errors import SlackClientNotConnectedError, SlackClientConfigurationError
 from .frame_header import FrameHeader
+from .frame_parser import FrameParser
+from .permessage_deflate import PerMessageDeflate
 from .internals import (
     _parse_handshake_response,
     _validate_sec_websocket_accept,
@@ -41,8 +44,18 @@ class Connection:
     ping_pong_trace_enabled: bool
     last_ping_pong_time: Optional[float]
 
+    # time.time() when connect() started, and the seconds from then to the first message received
+    connect_started_at: Optional[float]
+    first_message_latency: Optional[float]
+    # time.perf_counter() when data was last read off the socket
+    last_received_at: Optional[float]
+
     session_id: str
     sock: Optional[ssl.SSLSocket]
+    frame_parser: FrameParser
+    compression_enabled: bool
+    # set when the server accepted permessage-deflate for the current socket
+    deflate: Optional[PerMessageDeflate]
 
     on_message_listener: Optional[Callable[[str], None]]
     on_error_listener: Optional[Callable[[Exception], None]]
@@ -57,6 +70,8 @@ class Connection:
         ping_interval: float = 5,  # seconds
         receive_timeout: float = 3,
         receive_buffer_size: int = 1024,
+        max_message_size: int = 16 * 1024 * 1024,
+        compression_enabled: bool = False,
         trace_enabled: bool = False,
         all_message_trace_enabled: bool = False,
         ping_pong_trace_enabled: bool = False,
@@ -83,8 +98,14 @@ class Connection:
         self.all_message_trace_enabled = all_message_trace_enabled
         self.ping_pong_trace_enabled = ping_pong_trace_enabled
         self.last_ping_pong_time = None
+        self.connect_started_at = None
+        self.first_message_latency = None
+        self.last_received_at = None
         self.consecutive_check_state_error_count = 0
         self.sock = None
+        self.frame_parser = FrameParser(logger=logger, max_message_size=max_message_size)
+        self.compression_enabled = compression_enabled
+        self.deflate = None
         # To avoid ssl.SSLError: [SSL: BAD_LENGTH] bad length
         self.sock_receive_lock = Lock()
         self.sock_send_lock = Lock()
@@ -94,7 +115,15 @@ class Connection:
         self.on_close_listener = on_close_listener
         self.connection_type_name = connection_type_name
 
+        # trace logging of the received messages
+        self._repeated_messages = {"payload": 0}
+        self._ping_count = 0
+        self._pong_count = 0
+        self.ping_pong_log_summary_size = 1000
+
     def connect(self) -> None:
+        self.connect_started_at = time.time()
+        self.first_message_latency = None
         try:
             parsed_url = urlparse(self.url.strip())
             hostname: str = parsed_url.hostname
@@ -120,12 +149,17 @@ class Connection:
             try:
                 path = f"{parsed_url.path}?{parsed_url.query}"
                 sec_websocket_key = _generate_sec_websocket_key()
+                extensions = (
+                    f"\nSec-WebSocket-Extensions: {PerMessageDeflate.OFFER}"
+                    if self.compression_enabled
+                    else ""
+                )
                 message = f"""GET {path} HTTP/1.1
                     Host: {parsed_url.hostname}
                     Upgrade: websocket
                     Connection: Upgrade
                     Sec-WebSocket-Key: {sec_websocket_key}
-                    Sec-WebSocket-Version: 13
+                    Sec-WebSocket-Version: 13{extensions}
 
                 """
                 req: str = "\r\n".join([line.lstrip() for line in message.split("\n")])
@@ -136,7 +170,7 @@ class Connection:
                 with self.sock_send_lock:
                     sock.send(req.encode("utf-8"))
 
-                status, headers, text = _parse_handshake_response(sock)
+                status, headers, text, remaining = _parse_handshake_response(sock)
                 if self.trace_enabled:
                     self.logger.debug(
                         f"{self.connection_type_name} handshake response (session id: {self.session_id}):\n{text}"
@@ -148,7 +182,20 @@ class Connection:
                             f"Invalid response header detected in {self.connection_type_name} handshake response"
                             f" (session id: {self.session_id})"
                         )
+                    self.deflate = (
+                        PerMessageDeflate.from_response_header(headers.get("sec-websocket-extensions"))
+                        if self.compression_enabled
+                        else None
+                    )
+                    if self.trace_enabled and self.deflate is not None:
+                        self.logger.debug(
+                            f"permessage-deflate has been negotiated (session id: {self.session_id})"
+                        )
                     # set this successfully connected socket
+                    self.frame_parser.reset()
+                    self.frame_parser.deflate = self.deflate
+                    # the first frames may have arrived together with the handshake response
+                    self.frame_parser.add_pending(remaining)
                     self.sock = sock
                     self.ping(f"{self.session_id}:{time.time()}")
                 else:
@@ -204,7 +251,7 @@ class Connection:
         data = _build_data_frame_for_sending(payload, FrameHeader.OPCODE_PING)
         with self.sock_send_lock:
             if self.sock is not None:
-                self.sock.send(data)
+                self._send_frame(data)
             else:
                 if self.ping_pong_trace_enabled:
                     self.logger.debug(
@@ -222,7 +269,7 @@ class Connection:
         data = _build_data_frame_for_sending(payload, FrameHeader.OPCODE_PONG)
         with self.sock_send_lock:
             if self.sock is not None:
-                self.sock.send(data)
+                self._send_frame(data)
             else:
                 if self.ping_pong_trace_enabled:
                     self.logger.debug(
@@ -237,10 +284,19 @@ class Connection:
                 "Sending a text data frame "
                 f"(session id: {self.session_id}, payload: {payload})"
             )
-        data = _build_data_frame_for_sending(payload, FrameHeader.OPCODE_TEXT)
         with self.sock_send_lock:
             try:
-                self.sock.send(data)
+                deflate = self.deflate
+                if deflate is not None:
+                    # compressed under the lock, as the compression context is shared by the messages sent
+                    data = _build_data_frame_for_sending(
+                        deflate.compress(payload.encode("utf-8") if isinstance(payload, str) else payload),
+                        FrameHeader.OPCODE_TEXT,
+                        rsv1=1,
+                    )
+                else:
+                    data = _build_data_frame_for_sending(payload, FrameHeader.OPCODE_TEXT)
+                self._send_frame(data)
             except Exception as e:
                 # In most cases, we want to retry this operation with a newly established connection.
                 # Getting this exception means that this connection has been replaced with a new one
@@ -251,6 +307,20 @@ class Connection:
                     f"(session_id: {self.session_id}, error: {e})"
                 )
 
+    def _send_frame(self, data: bytes) -> None:
+        # Must be called with sock_send_lock held.
+        # The socket is non-blocking while it is registered with a Reactor,
+        # so sending has to wait until the socket is writable again.
+        with memoryview(data) as view:
+            while len(view) > 0:
+                try:
+                    sent = self.sock.send(view)
+                    view = view[sent:]
+                except (BlockingIOError, ssl.SSLWantWriteError, ssl.SSLWantReadError):
+                    _, writable, _ = select.select([], [self.sock], [], self.receive_timeout)
+                    if not writable:
+                        raise socket.timeout("Timed out sending a data frame")
+
     def check_state(self) -> None:
         try:
             if self.sock is not None:
@@ -299,171 +369,202 @@ class Connection:
                 self.disconnect()
 
     def run_until_completion(self, state: ConnectionState) -> None:
-        repeated_messages = {"payload": 0}
-        ping_count = 0
-        pong_count = 0
-        ping_pong_log_summary_size = 1000
         while not state.terminated:
-            try:
+            if self.is_active():
+                self.receive(state)
+            else:
+                time.sleep(0.2)
+
+        state.terminated = True
+
+    def receive(self, state: ConnectionState) -> bool:
+        """Receives the data available on the socket once and handles the messages completed by it.
+
+        run_until_completion() calls this in a loop on a blocking socket; a Reactor calls it
+        when the non-blocking socket becomes readable.
+
+        Args:
+            state: The state of this connection, terminated when it is closed
+
+        Returns:
+            True if data was received, False if there was nothing to read right now
+        """
+        try:
+            received_messages: Optional[
+                List[Tuple[Optional[FrameHeader], bytes]]
+            ] = _receive_messages(
+                sock=self.sock,
+                sock_receive_lock=self.sock_receive_lock,
+                logger=self.logger,
+                parser=self.frame_parser,
+                receive_buffer_size=self.receive_buffer_size,
+                all_message_trace_enabled=self.all_message_trace_enabled,
+            )
+            self.last_received_at = time.perf_counter()
+            if received_messages is None:
                 if self.is_active():
-                    received_messages: List[
-                        Tuple[Optional[FrameHeader], bytes]
-                    ] = _receive_messages(
-                        sock=self.sock,
-                        sock_receive_lock=self.sock_receive_lock,
-                        logger=self.logger,
-                        receive_buffer_size=self.receive_buffer_size,
-                        all_message_trace_enabled=self.all_message_trace_enabled,
+                    self.logger.info(
+                        f"The connection has been closed by the server (session id: {self.session_id})"
                     )
-                    for message in received_messages:
-                        header, data = message
+                    self.disconnect()
+                state.terminated = True
+                return False
+            for message in received_messages:
+                header, data = message
 
-                        # -----------------
-                        # trace logging
+                # -----------------
+                # trace logging
 
-                        if self.trace_enabled is True:
-                            opcode: str = (
-                                _to_readable_opcode(header.opcode) if header else "-"
-                            )
-                            payload: str = _parse_text_payload(data, self.logger)
-                            count: Optional[int] = repeated_messages.get(payload)
-                            if count is None:
-                                count = 1
-                            else:
-                                count += 1
-                            repeated_messages = {payload: count}
-                            if (
-                                not self.ping_pong_trace_enabled
-                                and header is not None
-                                and header.opcode is not None
-                            ):
-                                if header.opcode == FrameHeader.OPCODE_PING:
-                                    ping_count += 1
-                                    if ping_count % ping_pong_log_summary_size == 0:
-                                        self.logger.debug(
-                                            f"Received {ping_pong_log_summary_size} ping data frame "
-                                            f"(session id: {self.session_id})"
-                                        )
-                                        ping_count = 0
-                                if header.opcode == FrameHeader.OPCODE_PONG:
-                                    pong_count += 1
-                                    if pong_count % ping_pong_log_summary_size == 0:
-                                        self.logger.debug(
-                                            f"Received {ping_pong_log_summary_size} pong data frame "
-                                            f"(session id: {self.session_id})"
-                                        )
-                                        pong_count = 0
-
-                            ping_pong_to_skip = (
-                                header is not None
-                                and header.opcode is not None
-                                and (
-                                    header.opcode == FrameHeader.OPCODE_PING
-                                    or header.opcode == FrameHeader.OPCODE_PONG
+                if self.trace_enabled is True:
+                    opcode: str = (
+                        _to_readable_opcode(header.opcode) if header else "-"
+                    )
+                    payload: str = _parse_text_payload(data, self.logger)
+                    count: Optional[int] = self._repeated_messages.get(payload)
+                    if count is None:
+                        count = 1
+                    else:
+                        count += 1
+                    self._repeated_messages = {payload: count}
+                    if (
+                        not self.ping_pong_trace_enabled
+                        and header is not None
+                        and header.opcode is not None
+                    ):
+                        if header.opcode == FrameHeader.OPCODE_PING:
+                            self._ping_count += 1
+                            if self._ping_count % self.ping_pong_log_summary_size == 0:
+                                self.logger.debug(
+                                    f"Received {self.ping_pong_log_summary_size} ping data frame "
+                                    f"(session id: {self.session_id})"
                                 )
-                                and not self.ping_pong_trace_enabled
-                            )
-                            if not ping_pong_to_skip and count < 5:
-                                # if so many same payloads came in, the trace logging should be skipped.
-                                # e.g., after receiving "UNAUTHENTICATED: cache_error", many "opcode: -, payload: "
+                                self._ping_count = 0
+                        if header.opcode == FrameHeader.OPCODE_PONG:
+                            self._pong_count += 1
+                            if self._pong_count % self.ping_pong_log_summary_size == 0:
                                 self.logger.debug(
-                                    "Received a new data frame "
-                                    f"(session id: {self.session_id}, opcode: {opcode}, payload: {payload})"
+                                    f"Received {self.ping_pong_log_summary_size} pong data frame "
+                                    f"(session id: {self.session_id})"
                                 )
+                                self._pong_count = 0
+
+                    ping_pong_to_skip = (
+                        header is not None
+                        and header.opcode is not None
+                        and (
+                            header.opcode == FrameHeader.OPCODE_PING
+                            or header.opcode == FrameHeader.OPCODE_PONG
+                        )
+                        and not self.ping_pong_trace_enabled
+                    )
+                    if not ping_pong_to_skip and count < 5:
+                        # if so many same payloads came in, the trace logging should be skipped.
+                        # e.g., after receiving "UNAUTHENTICATED: cache_error", many "opcode: -, payload: "
+                        self.logger.debug(
+                            "Received a new data frame "
+                            f"(session id: {self.session_id}, opcode: {opcode}, payload: {payload})"
+                        )
 
-                        if header is None:
-                            # Skip no header message
-                            continue
-
-                        # -----------------
-                        # message with opcode
-
-                        if header.opcode == FrameHeader.OPCODE_PING:
-                            self.pong(data)
-                        elif header.opcode == FrameHeader.OPCODE_PONG:
-                            str_message = data.decode("utf-8")
-                            elements = str_message.split(":")
-                            if len(elements) >= 2:
-                                session_id, ping_time = elements[0], elements[1]
-                                if self.session_id == session_id:
-                                    try:
-                                        self.last_ping_pong_time = float(ping_time)
-                                    except Exception as e:
-                                        self.logger.debug(
-                                            "Failed to parse a pong message "
-                                            f" (message: {str_message}, error: {e}"
-                                        )
-                        elif header.opcode == FrameHeader.OPCODE_TEXT:
-                            if self.on_message_listener is not None:
-                                text = data.decode("utf-8")
-                                self.on_message_listener(text)
-                        elif header.opcode == FrameHeader.OPCODE_CLOSE:
-                            if self.on_close_listener is not None:
-                                if len(data) >= 2:
-                                    (code,) = struct.unpack("!H", data[:2])
-                                    reason = data[2:].decode("utf-8")
-                                    self.on_close_listener(code, reason)
-                                else:
-                                    self.on_close_listener(1005, "")
-                            self.disconnect()
-                            state.terminated = True
+                if header is None:
+                    # Skip no header message
+                    continue
+
+                # -----------------
+                # message with opcode
+
+                if header.opcode == FrameHeader.OPCODE_PING:
+                    self.pong(data)
+                elif header.opcode == FrameHeader.OPCODE_PONG:
+                    str_message = data.decode("utf-8")
+                    elements = str_message.split(":")
+                    if len(elements) >= 2:
+                        session_id, ping_time = elements[0], elements[1]
+                        if self.session_id == session_id:
+                            try:
+                                self.last_ping_pong_time = float(ping_time)
+                            except Exception as e:
+                                self.logger.debug(
+                                    "Failed to parse a pong message "
+                                    f" (message: {str_message}, error: {e}"
+                                )
+                elif header.opcode == FrameHeader.OPCODE_TEXT:
+                    if self.first_message_latency is None:
+                        self.first_message_latency = time.time() - self.connect_started_at
+                        if self.trace_enabled:
+                            self.logger.debug(
+                                f"Received the first message {self.first_message_latency:.3f} seconds "
+                                f"after starting to connect (session id: {self.session_id})"
+                            )
+                    if self.on_message_listener is not None:
+                        text = data.decode("utf-8")
+                        self.on_message_listener(text)
+                elif header.opcode == FrameHeader.OPCODE_CLOSE:
+                    if self.on_close_listener is not None:
+                        if len(data) >= 2:
+                            (code,) = struct.unpack("!H", data[:2])
+                            reason = data[2:].decode("utf-8")
+                            self.on_close_listener(code, reason)
                         else:
-                            # Just warn logging
-                            opcode = (
-                                _to_readable_opcode(header.opcode) if header else "-"
+                            self.on_close_listener(1005, "")
+                    self.disconnect()
+                    state.terminated = True
+                else:
+                    # Just warn logging
+                    opcode = (
+                        _to_readable_opcode(header.opcode) if header else "-"
+                    )
+                    payload: Union[bytes, str] = data
+                    if header.opcode != FrameHeader.OPCODE_BINARY:
+                        try:
+                            payload = (
+                                data.decode("utf-8") if data is not None else ""
                             )
-                            payload: Union[bytes, str] = data
-                            if header.opcode != FrameHeader.OPCODE_BINARY:
-                                try:
-                                    payload = (
-                                        data.decode("utf-8") if data is not None else ""
-                                    )
-                                except Exception as e:
-                                    self.logger.info(
-                                        f"Failed to convert the data to text {e}"
-                                    )
-                            message = (
-                                "Received an unsupported data frame "
-                                f"(session id: {self.session_id}, opcode: {opcode}, payload: {payload})"
+                        except Exception as e:
+                            self.logger.info(
+                                f"Failed to convert the data to text {e}"
                             )
-                            self.logger.warning(message)
-                else:
-                    time.sleep(0.2)
-            except socket.timeout:
-                time.sleep(0.01)
-            except OSError as e:
-                # getting errno.EBADF and the socket is no longer available
-                if e.errno == 9 and state.terminated:
-                    self.logger.debug(
-                        "The reason why you got [Errno 9] Bad file descriptor here is "
-                        "the socket is no longer available."
+                    message = (
+                        "Received an unsupported data frame "
+                        f"(session id: {self.session_id}, opcode: {opcode}, payload: {payload})"
                     )
-                else:
-                    if self.on_error_listener is not None:
-                        self.on_error_listener(e)
-                    else:
-                        self.logger.exception(
-                            "Got an OSError while receiving data"
-                            f" (session id: {self.session_id}, error: {e})"
-                        )
-                # As this connection no longer works in any way, terminating it
-                if self.is_active():
-                    try:
-                        self.disconnect()
-                    except Exception as disconnection_error:
-                        self.logger.exception(
-                            "Failed to disconnect"
-                            f" (session id: {self.session_id}, error: {disconnection_error})"
-                        )
-                state.terminated = True
-                break
-            except Exception as e:
+                    self.logger.warning(message)
+            return True
+        except socket.timeout:
+            time.sleep(0.01)
+        except (BlockingIOError, ssl.SSLWantReadError):
+            # nothing more to read on the non-blocking socket for now
+            pass
+        except OSError as e:
+            # getting errno.EBADF and the socket is no longer available
+            if e.errno == 9 and state.terminated:
+                self.logger.debug(
+                    "The reason why you got [Errno 9] Bad file descriptor here is "
+                    "the socket is no longer available."
+                )
+            else:
                 if self.on_error_listener is not None:
                     self.on_error_listener(e)
                 else:
                     self.logger.exception(
-                        "Got an exception while receiving data"
+                        "Got an OSError while receiving data"
                         f" (session id: {self.session_id}, error: {e})"
                     )
-
-        state.terminated = True
+            # As this connection no longer works in any way, terminating it
+            if self.is_active():
+                try:
+                    self.disconnect()
+                except Exception as disconnection_error:
+                    self.logger.exception(
+                        "Failed to disconnect"
+                        f" (session id: {self.session_id}, error: {disconnection_error})"
+                    )
+            state.terminated = True
+        except Exception as e:
+            if self.on_error_listener is not None:
+                self.on_error_listener(e)
+            else:
+                self.logger.exception(
+                    "Got an exception while receiving data"
+                    f" (session id: {self.session_id}, error: {e})"
+                )
+        return False
@@ -0,0 +1,247 @@
+import struct
+from logging import Logger
+from typing import Callable, List, Optional, Tuple
+
+from .frame_header import FrameHeader
+from .masking import _apply_mask
+from .permessage_deflate import PerMessageDeflate
+
+
+class FrameParser:
+    """Incremental parser for the data frames received on a WebSocket connection.
+
+    Received bytes are appended to a single buffer and complete frames are parsed
+    out of it in a loop. A frame split across reads simply stays in the buffer
+    until the rest of it arrives.
+
+    Fragmented messages are reassembled into a preallocated buffer and returned
+    as one message with the opcode of the first frame. Control frames arriving
+    in between the fragments are returned right away. A message larger than
+    `max_message_size` is skipped as it arrives, without being buffered.
+
+    When permessage-deflate has been negotiated (`deflate`), compressed messages
+    are decompressed once they are complete.
+    """
+
+    buffer: bytearray
+    max_message_size: int
+    frames_parsed: int
+    # the number of bytes copied from the buffer into the returned payloads
+    bytes_copied: int
+    skipped_messages: int
+    deflate: Optional[PerMessageDeflate]
+
+    def __init__(
+        self,
+        logger: Optional[Logger] = None,
+        max_message_size: int = 16 * 1024 * 1024,
+        initial_message_buffer_size: int = 64 * 1024,
+    ):
+        self.logger = logger
+        self.max_message_size = max_message_size
+        self.buffer = bytearray()
+        self.frames_parsed = 0
+        self.bytes_copied = 0
+        self.skipped_messages = 0
+        self.deflate = None
+        self._message = bytearray(initial_message_buffer_size)
+        self.reset()
+
+    def reset(self) -> None:
+        """Discards any partially received frame, e.g. when the socket is replaced."""
+        self.buffer.clear()
+        self._unparsed = False
+        # the header of the first frame of a fragmented message being reassembled
+        self._message_header: Optional[FrameHeader] = None
+        self._message_length = 0
+        # the bytes to drop of a frame that is too large
+        self._skip_bytes = 0
+        # True while dropping the remaining fragments of a message that is too large
+        self._skip_fragments = False
+
+    def receive(
+        self,
+        recv_into: Callable[[memoryview], int],
+        size: int,
+    ) -> Tuple[int, List[Tuple[Optional[FrameHeader], bytes]]]:
+        """Reads up to `size` bytes straight into the buffer and parses them.
+
+        Args:
+            recv_into: A function like socket.recv_into
+            size: The maximum number of bytes to read
+
+        Returns:
+            (the number of bytes read or left from add_pending(), 0 at the end of the stream,
+             the complete messages)
+        """
+        if self._unparsed:
+            self._unparsed = False
+            return len(self.buffer), self._parse()
+        start = len(self.buffer)
+        self.buffer.extend(bytes(size))
+        try:
+            with memoryview(self.buffer) as view:
+                received = recv_into(view[start:])
+        except BaseException:
+            del self.buffer[start:]
+            raise
+        del self.buffer[start + received :]
+        if received == 0:
+            return 0, []
+        return received, self._parse()
+
+    def add_pending(self, data: bytes) -> None:
+        """Keeps bytes received before the receive loop started (e.g. right after
+        the handshake response) to be parsed by the next receive() call."""
+        if len(data) > 0:
+            self.buffer += data
+            self._unparsed = True
+
+    def feed(self, data: bytes) -> List[Tuple[Optional[FrameHeader], bytes]]:
+        """Appends already received bytes to the buffer and parses them."""
+        self.buffer += data
+        return self._parse()
+
+    def _parse(self) -> List[Tuple[Optional[FrameHeader], bytes]]:
+        messages: List[Tuple[Optional[FrameHeader], bytes]] = []
+        buffer = self.buffer
+        size = len(buffer)
+        pos = 0
+        with memoryview(buffer) as view:
+            while pos < size:
+                if self._skip_bytes > 0:
+                    skipped = min(self._skip_bytes, size - pos)
+                    self._skip_bytes -= skipped
+                    pos += skipped
+                    continue
+
+                b1 = buffer[pos]
+                if b1 == 10 and self._message_header is None:  # \n
+                    # the remainder of the handshake response
+                    messages.append((None, b"\n"))
+                    pos += 1
+                    continue
+                if size - pos < 2:
+                    break
+
+                # https://tools.ietf.org/html/rfc6455#section-5.2
+                b2 = buffer[pos + 1]
+                length: int = b2 & 0b01111111
+                idx = pos + 2
+                if length == 126:
+                    if size < idx + 2:
+                        break
+                    (length,) = struct.unpack_from("!H", buffer, idx)
+                    idx += 2
+                elif length == 127:
+                    if size < idx + 8:
+                        break
+                    (length,) = struct.unpack_from("!Q", buffer, idx)
+                    idx += 8
+                masked = b2 & 0b10000000
+                mask_key = None
+                if masked:
+                    if size < idx + 4:
+                        break
+                    mask_key = bytes(view[idx : idx + 4])
+                    idx += 4
+
+                header = FrameHeader(
+                    fin=b1 & 0b10000000,
+                    rsv1=b1 & 0b01000000,
+                    rsv2=b1 & 0b00100000,
+                    rsv3=b1 & 0b00010000,
+                    opcode=b1 & 0b00001111,
+                    masked=masked,
+                    length=length,
+                )
+                is_control = header.opcode >= FrameHeader.OPCODE_CLOSE
+                is_continuation = header.opcode == FrameHeader.OPCODE_CONTINUATION
+                if not is_control and not is_continuation:
+                    self._skip_fragments = False
+                if not is_control and (
+                    self._skip_fragments
+                    and is_continuation
+                    or self._message_length + length > self.max_message_size
+                ):
+                    # too large, drop it as it arrives instead of waiting for all of it
+                    if not self._skip_fragments:
+                        self.skipped_messages += 1
+                        self._warn(
+                            f"Skipped a message larger than max_message_size ({self.max_message_size} bytes)"
+                        )
+                    self._skip_fragments = not header.fin
+                    self._message_header = None
+                    self._message_length = 0
+                    self._skip_bytes = length
+                    pos = idx
+                    continue
+
+                end = idx + length
+                if size < end:
+                    # need more bytes to complete this frame
+                    break
+                data = view[idx:end]
+                if mask_key is not None:
+                    data = _apply_mask(data, mask_key)
+                self.frames_parsed += 1
+                pos = end
+
+                if is_control or (header.fin and self._message_header is None):
+                    # a whole message in a single frame
+                    self._append_message(messages, header, bytes(data))
+                    self.bytes_copied += length
+                elif is_continuation and self._message_header is None:
+                    self._warn("Received a continuation frame without a preceding data frame")
+                else:
+                    if self._message_header is None:
+                        self._message_header = header
+                    elif not is_continuation:
+                        self._warn("Received a new data frame before the fragmented message was completed")
+                        self._message_header = header
+                        self._message_length = 0
+                    self._append_fragment(data)
+                    if header.fin:
+                        message_header = self._message_header
+                        message_header.fin = header.fin
+                        message_header.length = self._message_length
+                        with memoryview(self._message) as message:
+                            self._append_message(messages, message_header, bytes(message[: self._message_length]))
+                        self.bytes_copied += self._message_length
+                        self._message_header = None
+                        self._message_length = 0
+                del data
+
+        if pos > 0:
+            # bytearray deletes from the front without moving the remaining bytes
+            del buffer[:pos]
+        return messages
+
+    def _append_message(
+        self,
+        messages: List[Tuple[Optional[FrameHeader], bytes]],
+        header: FrameHeader,
+        data: bytes,
+    ) -> None:
+        if header.rsv1 and self.deflate is not None and header.opcode < FrameHeader.OPCODE_CLOSE:
+            data = self.deflate.decompress(data, self.max_message_size)
+            if data is None:
+                self.skipped_messages += 1
+                self._warn(
+                    f"Skipped a message larger than max_message_size ({self.max_message_size} bytes) after decompression"
+                )
+                return
+            header.length = len(data)
+        messages.append((header, data))
+
+    def _append_fragment(self, data) -> None:
+        start, end = self._message_length, self._message_length + len(data)
+        if end > len(self._message):
+            self._message.extend(bytes(max(end, 2 * len(self._message)) - len(self._message)))
+        self._message[start:end] = data
+        self._message_length = end
+        self.bytes_copied += len(data)
+
+    def _warn(self, message: str) -> None:
+        if self.logger is not None:
+            self.logger.warning(message)
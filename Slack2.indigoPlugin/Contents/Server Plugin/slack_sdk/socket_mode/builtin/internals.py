@@ -1,8 +1,6 @@
 import errno
 import hashlib
-import itertools
 import os
-import random
 import socket
 from socket import socket as Socket
 import ssl
@@ -11,29 +9,55 @@ from base64 import encodebytes, b64encode
 from hmac import compare_digest
 from logging import Logger
 from threading import Lock
-from typing import Tuple, Optional, Union, List, Callable, Dict
+from typing import Tuple, Optional, Union, List, Dict
 from urllib.parse import urlparse, unquote
 
 from .frame_header import FrameHeader
+from .frame_parser import FrameParser
+from .masking import _apply_mask
 
 
-def _parse_connect_response(sock: Socket) -> Tuple[Optional[int], str]:
-    status = None
-    lines = []
+def _read_http_response_head(
+    sock: Union[ssl.SSLSocket, Socket],
+    receive_buffer_size: int = 4096,
+    max_head_size: int = 65536,
+) -> Tuple[bytes, bytes]:
+    """Reads an HTTP response up to the blank line ending its headers.
+
+    The response is received in blocks instead of one byte (one SSL read) at a time.
+
+    Args:
+        sock: The current active socket
+        receive_buffer_size: the chunk size of a single socket recv operation
+        max_head_size: the largest status line and headers to accept
+
+    Returns:
+        (status line and headers, the bytes received after them)
+    """
+    received = bytearray()
+    searched = 0
     while True:
-        line = []
-        while True:
-            c = sock.recv(1)
-            line.append(c)
-            if c == b"\n":
-                break
-        line = b"".join(line).decode("utf-8").strip()
-        if line is None or len(line) == 0:
-            break
-        lines.append(line)
-        if not status:
-            status_line = line.split(" ", 2)
-            status = int(status_line[1])
+        end = received.find(b"\r\n\r\n", max(0, searched - 3))
+        if end >= 0:
+            return bytes(received[:end]), bytes(received[end + 4 :])
+        if len(received) > max_head_size:
+            raise ValueError(f"Too large HTTP response headers (>{max_head_size} bytes)")
+        searched = len(received)
+        chunk = sock.recv(receive_buffer_size)
+        if len(chunk) == 0:
+            raise ConnectionError("The connection was closed before the whole HTTP response was received")
+        received += chunk
+
+
+def _parse_connect_response(sock: Socket) -> Tuple[Optional[int], str]:
+    head, remaining = _read_http_response_head(sock)
+    if len(remaining) > 0:
+        # The proxy must not send anything before the TLS handshake starts
+        raise ValueError("Received unexpected data after the proxy connect response")
+    text = head.decode("utf-8")
+    lines = [line.strip() for line in text.split("\r\n")]
+    status_line = lines[0].split(" ", 2)
+    status = int(status_line[1]) if len(status_line) > 1 else None
     return status, "\n".join(lines)
 
 
@@ -109,44 +133,31 @@ def _establish_new_socket_connection(
     return sock
 
 
-def _read_http_response_line(sock: ssl.SSLSocket) -> str:
-    cs = []
-    while True:
-        c: str = sock.recv(1).decode("utf-8")
-        if c == "\r":
-            break
-        if c != "\n":
-            cs.append(c)
-    return "".join(cs)
-
-
-def _parse_handshake_response(sock: ssl.SSLSocket) -> Tuple[Optional[int], dict, str]:
+def _parse_handshake_response(
+    sock: ssl.SSLSocket,
+) -> Tuple[Optional[int], dict, str, bytes]:
     """Parses the handshake response.
 
     Args:
         sock: The current active socket
 
     Returns:
-        (http status, headers, whole response as a str)
+        (http status, headers, whole response as a str,
+         the bytes received after the response, which belong to the first data frames)
     """
-    lines = []
+    head, remaining = _read_http_response_head(sock)
+    lines = head.decode("utf-8").split("\r\n")
     status = None
     headers = {}
-    while True:
-        line = _read_http_response_line(sock)
-        if status is None:
-            elements = line.split(" ")
-            if len(elements) > 2:
-                status = int(elements[1])
-        else:
-            elements = line.split(":")
-            if len(elements) == 2:
-                headers[elements[0].strip().lower()] = elements[1].strip()
-        if line is None or len(line.strip()) == 0:
-            break
-        lines.append(line)
+    elements = lines[0].split(" ")
+    if len(elements) > 2:
+        status = int(elements[1])
+    for line in lines[1:]:
+        elements = line.split(":", 1)
+        if len(elements) == 2:
+            headers[elements[0].strip().lower()] = elements[1].strip()
     text = "\n".join(lines)
-    return (status, headers, text)
+    return (status, headers, text, remaining)
 
 
 def _generate_sec_websocket_key() -> str:
@@ -191,192 +202,35 @@ def _receive_messages(
     sock: ssl.SSLSocket,
     sock_receive_lock: Lock,
     logger: Logger,
+    parser: FrameParser,
     receive_buffer_size: int = 1024,
     all_message_trace_enabled: bool = False,
-) -> List[Tuple[Optional[FrameHeader], bytes]]:
-    def receive(specific_buffer_size: Optional[int] = None):
-        size = (
-            specific_buffer_size
-            if specific_buffer_size is not None
-            else receive_buffer_size
-        )
-        with sock_receive_lock:
-            try:
-                received_bytes = sock.recv(size)
-                if all_message_trace_enabled:
-                    if len(received_bytes) > 0:
-                        logger.debug(f"Received bytes: {received_bytes}")
-                return received_bytes
-            except OSError as e:
-                # For Linux/macOS, errno.EBADF is the expected error for bad connections.
-                # The errno.ENOTSOCK can be sent when running on Windows OS.
-                if e.errno in (errno.EBADF, errno.ENOTSOCK):
-                    logger.debug("The connection seems to be already closed.")
-                    return bytes()
-                raise e
-
-    return _fetch_messages(
-        messages=[],
-        receive=receive,
-        remaining_bytes=None,
-        current_mask_key=None,
-        current_header=None,
-        current_data=bytes(),
-        logger=logger,
-    )
-
-
-def _fetch_messages(
-    messages: List[Tuple[Optional[FrameHeader], bytes]],
-    receive: Callable[[Optional[int]], bytes],  # buffer size
-    logger: Logger,
-    remaining_bytes: Optional[bytes] = None,
-    current_mask_key: Optional[str] = None,
-    current_header: Optional[FrameHeader] = None,
-    current_data: Optional[bytes] = None,
-) -> List[Tuple[Optional[FrameHeader], bytes]]:
-
-    if remaining_bytes is None:
-        # Fetch more to complete the current message
-        remaining_bytes = receive()  # type: ignore
-
-    if remaining_bytes is None or len(remaining_bytes) == 0:
-        # no more bytes
-        if current_header is not None:
-            _append_message(messages, current_header, current_data)
-        return messages
-
-    if current_header is None:
-        # new message
-        if len(remaining_bytes) <= 2:
-            remaining_bytes += receive()  # type: ignore
-
-        if remaining_bytes[0] == 10:  # \n
-            if current_data is not None and len(current_data) >= 0:
-                _append_message(messages, current_header, current_data)
-            _append_message(messages, None, remaining_bytes[:1])
-            remaining_bytes = remaining_bytes[1:]
-            if len(remaining_bytes) == 0:
-                return messages
-            else:
-                return _fetch_messages(
-                    messages=messages,
-                    receive=receive,
-                    remaining_bytes=remaining_bytes,
-                    logger=logger,
-                )
-
-        # https://tools.ietf.org/html/rfc6455#section-5.2
-        b1, b2 = remaining_bytes[0], remaining_bytes[1]
-
-        # determine data length and the first index of the data part
-        current_data_length: int = b2 & 0b01111111
-        idx_after_length_part: int = 2
-        if current_data_length == 126:
-            if len(remaining_bytes) < 4:
-                remaining_bytes += receive(1024)
-            current_data_length = struct.unpack("!H", bytes(remaining_bytes[2:4]))[0]
-            idx_after_length_part = 4
-        elif current_data_length == 127:
-            if len(remaining_bytes) < 10:
-                remaining_bytes += receive(1024)
-            current_data_length = struct.unpack("!H", bytes(remaining_bytes[2:10]))[0]
-            idx_after_length_part = 10
-
-        current_header = FrameHeader(
-            fin=b1 & 0b10000000,
-            rsv1=b1 & 0b01000000,
-            rsv2=b1 & 0b00100000,
-            rsv3=b1 & 0b00010000,
-            opcode=b1 & 0b00001111,
-            masked=b2 & 0b10000000,
-            length=current_data_length,
-        )
-        if current_header.masked > 0:
-            if current_mask_key is None:
-                idx1, idx2 = idx_after_length_part, idx_after_length_part + 4
-                current_mask_key = remaining_bytes[idx1:idx2]
-                idx_after_length_part += 4
-
-        start, end = idx_after_length_part, idx_after_length_part + current_data_length
-        data_to_append = remaining_bytes[start:end]
-
-        current_data = bytes()
-        if current_header.masked > 0:
-            for i in range(data_to_append):
-                mask = current_mask_key[i % 4]
-                data_to_append[i] ^= mask  # type: ignore
-            current_data += data_to_append
-        else:
-            current_data += data_to_append
-        if len(current_data) == current_data_length:
-            _append_message(messages, current_header, current_data)
-            remaining_bytes = remaining_bytes[end:]
-            if len(remaining_bytes) > 0:
-                # continue with the remaining data
-                return _fetch_messages(
-                    messages=messages,
-                    receive=receive,
-                    remaining_bytes=remaining_bytes,
-                    logger=logger,
-                )
-            else:
-                return messages
-        elif len(current_data) < current_data_length:
-            # need more bytes to complete this message
-            return _fetch_messages(
-                messages=messages,
-                receive=receive,
-                current_mask_key=current_mask_key,
-                current_header=current_header,
-                current_data=current_data,
-                logger=logger,
-            )
-        else:
-            # This pattern is unexpected but set data with the expected length anyway
-            _append_message(current_header, current_data[:current_data_length])  # type: ignore
-            return messages
-
-    # work in progress with the current_header/current_data
-    if current_header is not None:
-        length_needed = current_header.length - len(current_data)
-        if length_needed > len(remaining_bytes):
-            current_data += remaining_bytes
-            # need more bytes to complete this message
-            return _fetch_messages(
-                messages=messages,
-                receive=receive,
-                current_mask_key=current_mask_key,
-                current_header=current_header,
-                current_data=current_data,
-                logger=logger,
-            )
-        else:
-            current_data += remaining_bytes[:length_needed]
-            _append_message(messages, current_header, current_data)
-            remaining_bytes = remaining_bytes[length_needed:]
-            if len(remaining_bytes) == 0:
-                return messages
-            else:
-                # continue with the remaining data
-                return _fetch_messages(
-                    messages=messages,
-                    receive=receive,
-                    remaining_bytes=remaining_bytes,
-                    logger=logger,
-                )
+) -> Optional[List[Tuple[Optional[FrameHeader], bytes]]]:
+    """Receives the available bytes and returns the messages completed by them.
 
+    A partially received frame is kept in the parser until a later call completes it.
+    Returns None when the connection has been closed.
+    """
+    with sock_receive_lock:
+        if sock is None:
+            return None
+        try:
+            received, messages = parser.receive(sock.recv_into, receive_buffer_size)
+        except OSError as e:
+            # For Linux/macOS, errno.EBADF is the expected error for bad connections.
+            # The errno.ENOTSOCK can be sent when running on Windows OS.
+            if e.errno in (errno.EBADF, errno.ENOTSOCK):
+                logger.debug("The connection seems to be already closed.")
+                return None
+            raise e
+    if received == 0:
+        # the peer closed the connection
+        return None
+    if all_message_trace_enabled:
+        logger.debug(f"Received {received} bytes ({len(messages)} messages completed)")
     return messages
 
 
-def _append_message(
-    messages: List[Tuple[Optional[FrameHeader], bytes]],
-    header: Optional[FrameHeader],
-    data: bytes,
-) -> None:
-    messages.append((header, data))
-
-
 def _build_data_frame_for_sending(
     payload: Union[str, bytes],
     opcode: int,
@@ -396,15 +250,14 @@ def _build_data_frame_for_sending(
     if payload_length <= 125:
         b2 = masked << 7 | payload_length
         header += bytes([b2])
-    else:
+    elif payload_length <= 0xFFFF:
         b2 = masked << 7 | 126
         header += struct.pack("!BH", b2, payload_length)
+    else:
+        b2 = masked << 7 | 127
+        header += struct.pack("!BQ", b2, payload_length)
 
-    mask_key: List[int] = random.choices(range(256), k=4)
-    header += bytes(mask_key)
+    mask_key: bytes = os.urandom(4)
+    header += mask_key
+    return header + _apply_mask(original_payload_data, mask_key)
 
-    payload_data: bytes = bytes(
-        byte ^ mask
-        for byte, mask in zip(original_payload_data, itertools.cycle(mask_key))
-    )
-    return header + payload_data
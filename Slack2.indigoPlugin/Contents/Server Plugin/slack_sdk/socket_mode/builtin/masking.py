@@ -0,0 +1,15 @@
+from typing import Union
+
+
+def _apply_mask(data: Union[bytes, bytearray, memoryview], mask_key: bytes) -> bytes:
+    """Masks (or unmasks) a payload with the 4-byte key.
+
+    Instead of XOR-ing byte by byte, the payload and the repeated key are XOR-ed
+    as two big integers, which runs as a word-at-a-time loop in C.
+    """
+    length = len(data)
+    if length == 0:
+        return b""
+    key = (mask_key * (length // 4 + 1))[:length]
+    masked = int.from_bytes(data, "little") ^ int.from_bytes(key, "little")
+    return masked.to_bytes(length, "little")
@@ -0,0 +1,122 @@
+"""permessage-deflate WebSocket extension
+
+* https://datatracker.ietf.org/doc/html/rfc7692
+
+"""
+import zlib
+from typing import Optional
+
+# The last 4 bytes of a deflate block flushed with Z_SYNC_FLUSH,
+# which are removed from a compressed message before it is sent
+_EMPTY_BLOCK_TAIL = b"\x00\x00\xff\xff"
+
+
+class PerMessageDeflate:
+    """The negotiated permessage-deflate parameters, and the compression context of a connection.
+
+    Unless the server disables it with *_no_context_takeover, the same zlib stream is kept
+    across messages, so that repeated JSON keys in later messages compress to back-references.
+    """
+
+    # The extension offer in the handshake request
+    OFFER = "permessage-deflate; client_max_window_bits"
+
+    server_no_context_takeover: bool
+    client_no_context_takeover: bool
+    server_max_window_bits: int
+    client_max_window_bits: int
+
+    # sizes of the message payloads before and after compression/decompression
+    received_compressed_bytes: int
+    received_bytes: int
+    sent_bytes: int
+    sent_compressed_bytes: int
+
+    def __init__(
+        self,
+        server_no_context_takeover: bool = False,
+        client_no_context_takeover: bool = False,
+        server_max_window_bits: int = 15,
+        client_max_window_bits: int = 15,
+        compression_level: int = zlib.Z_DEFAULT_COMPRESSION,
+    ):
+        self.server_no_context_takeover = server_no_context_takeover
+        self.client_no_context_takeover = client_no_context_takeover
+        self.server_max_window_bits = server_max_window_bits
+        self.client_max_window_bits = client_max_window_bits
+        self.compression_level = compression_level
+        self.received_compressed_bytes = 0
+        self.received_bytes = 0
+        self.sent_bytes = 0
+        self.sent_compressed_bytes = 0
+        self._decompressor = self._new_decompressor()
+        self._compressor = self._new_compressor()
+
+    @classmethod
+    def from_response_header(cls, value: Optional[str]) -> Optional["PerMessageDeflate"]:
+        """Returns the extension the server accepted in Sec-WebSocket-Extensions, if any.
+
+        Args:
+            value: The Sec-WebSocket-Extensions header value in the handshake response
+
+        Returns:
+            The negotiated extension, or None if the server did not accept it
+        """
+        if value is None:
+            return None
+        for extension in value.split(","):
+            params = [p.strip() for p in extension.split(";")]
+            if params[0].lower() != "permessage-deflate":
+                continue
+            options = {}
+            for param in params[1:]:
+                name, _, param_value = param.partition("=")
+                options[name.strip().lower()] = param_value.strip().strip('"')
+            return cls(
+                server_no_context_takeover="server_no_context_takeover" in options,
+                client_no_context_takeover="client_no_context_takeover" in options,
+                server_max_window_bits=int(options.get("server_max_window_bits") or 15),
+                client_max_window_bits=int(options.get("client_max_window_bits") or 15),
+            )
+        return None
+
+    def decompress(self, data: bytes, max_length: int = 0) -> Optional[bytes]:
+        """Decompresses a received message (the payload of the frames with RSV1 set).
+
+        Args:
+            data: The compressed message
+            max_length: The largest message to return, 0 for no limit
+
+        Returns:
+            The message, or None if it is larger than max_length
+        """
+        if self.server_no_context_takeover:
+            self._decompressor = self._new_decompressor()
+        self.received_compressed_bytes += len(data)
+        message = self._decompressor.decompress(data + _EMPTY_BLOCK_TAIL, max_length)
+        if self._decompressor.unconsumed_tail:
+            # too large; keep inflating so that the shared context stays in sync, but drop the output
+            while self._decompressor.unconsumed_tail:
+                self._decompressor.decompress(self._decompressor.unconsumed_tail, max_length)
+            return None
+        self.received_bytes += len(message)
+        return message
+
+    def compress(self, data: bytes) -> bytes:
+        """Compresses a message to send in frames with RSV1 set."""
+        if self.client_no_context_takeover:
+            self._compressor = self._new_compressor()
+        compressed = self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        if compressed.endswith(_EMPTY_BLOCK_TAIL):
+            compressed = compressed[: -len(_EMPTY_BLOCK_TAIL)]
+        self.sent_bytes += len(data)
+        self.sent_compressed_bytes += len(compressed)
+        return compressed
+
+    def _new_decompressor(self):
+        return zlib.decompressobj(wbits=-self.server_max_window_bits)
+
+    def _new_compressor(self):
+        # zlib does not support raw deflate streams with an 8-bit window
+        window_bits = max(9, self.client_max_window_bits)
+        return zlib.compressobj(self.compression_level, zlib.DEFLATED, -window_bits)
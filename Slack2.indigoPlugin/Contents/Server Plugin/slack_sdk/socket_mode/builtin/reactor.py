@@ -0,0 +1,159 @@
+"""A selector-driven event loop multiplexing many builtin WebSocket connections on one thread
+
+Without a reactor, each SocketModeClient / RTMClient (v2) receives on its own thread,
+blocking in recv with a timeout and sleeping in between. A reactor instead waits for any
+of the registered sockets to become readable and handles the frames right away.
+
+    reactor = Reactor(logger=logger).start()
+    client = SocketModeClient(app_token=app_token, reactor=reactor)
+
+"""
+import logging
+import selectors
+import socket
+import ssl
+from logging import Logger
+from threading import Lock, Thread
+from typing import Dict, List, Optional, Tuple
+
+from .connection import Connection, ConnectionState
+
+
+class Reactor:
+    logger: Logger
+    selector: selectors.BaseSelector
+
+    # the maximum number of receive operations for one connection at a time,
+    # so that a busy connection does not delay the others
+    max_receives_per_wakeup: int
+
+    def __init__(
+        self,
+        logger: Optional[Logger] = None,
+        max_receives_per_wakeup: int = 64,
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_receives_per_wakeup = max_receives_per_wakeup
+        self.selector = selectors.DefaultSelector()
+        self.closed = False
+
+        self._lock = Lock()
+        self._commands: List[Tuple[str, Connection, Optional[ConnectionState]]] = []
+        self._states: Dict[Connection, ConnectionState] = {}
+        # connections with data left in the SSL buffer, which the selector does not know about
+        self._ready: List[Connection] = []
+        self._wakeup_receiver, self._wakeup_sender = socket.socketpair()
+        self._wakeup_receiver.setblocking(False)
+        self._wakeup_sender.setblocking(False)
+        self.selector.register(self._wakeup_receiver, selectors.EVENT_READ)
+        self._thread = Thread(target=self._run, name="Slack WebSocket reactor", daemon=True)
+
+    def start(self) -> "Reactor":
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        """Stops the I/O thread. The registered connections are left open."""
+        self.closed = True
+        self._wakeup()
+        if self._thread.is_alive():
+            self._thread.join(5)
+        self.selector.close()
+        self._wakeup_receiver.close()
+        self._wakeup_sender.close()
+
+    def register(self, connection: Connection, state: ConnectionState) -> None:
+        """Starts receiving on a connected connection, until its state is terminated.
+
+        The socket is switched to non-blocking mode.
+        """
+        self._command("register", connection, state)
+
+    def unregister(self, connection: Connection) -> None:
+        """Stops receiving on a connection. Call this before closing it."""
+        self._command("unregister", connection, None)
+
+    def connection_count(self) -> int:
+        return len(self._states)
+
+    def _command(self, name: str, connection: Connection, state: Optional[ConnectionState]) -> None:
+        with self._lock:
+            self._commands.append((name, connection, state))
+        self._wakeup()
+
+    def _wakeup(self) -> None:
+        try:
+            self._wakeup_sender.send(b"\0")
+        except (BlockingIOError, OSError):
+            # already woken up, or closed
+            pass
+
+    def _run(self) -> None:
+        while not self.closed:
+            try:
+                events = self.selector.select(timeout=0 if self._ready else None)
+                self._run_commands()
+                ready, self._ready = self._ready, []
+                for key, _ in events:
+                    if key.fileobj is self._wakeup_receiver:
+                        self._drain_wakeups()
+                    elif key.data in self._states and key.data not in ready:
+                        ready.append(key.data)
+                for connection in ready:
+                    self._receive(connection)
+            except Exception as e:
+                if not self.closed:
+                    self.logger.exception(f"Failed to receive WebSocket messages (error: {e})")
+
+    def _run_commands(self) -> None:
+        with self._lock:
+            commands, self._commands = self._commands, []
+        for name, connection, state in commands:
+            if name == "register":
+                sock = connection.sock
+                if sock is None or state.terminated:
+                    continue
+                stale_key = self.selector.get_map().get(sock.fileno())
+                if stale_key is not None:
+                    # a connection closed without being unregistered, whose descriptor has been reused
+                    self._remove(stale_key.data)
+                sock.setblocking(False)
+                self.selector.register(sock, selectors.EVENT_READ, connection)
+                self._states[connection] = state
+                # the handshake may already have received the first frames
+                self._ready.append(connection)
+            else:
+                self._remove(connection)
+
+    def _receive(self, connection: Connection) -> None:
+        state = self._states.get(connection)
+        if state is None:
+            return
+        for _ in range(self.max_receives_per_wakeup):
+            if state.terminated or not connection.is_active():
+                break
+            if not connection.receive(state):
+                break
+        else:
+            sock = connection.sock
+            if isinstance(sock, ssl.SSLSocket) and sock.pending() > 0:
+                self._ready.append(connection)
+        if state.terminated or not connection.is_active():
+            state.terminated = True
+            self._remove(connection)
+
+    def _remove(self, connection: Connection) -> None:
+        self._states.pop(connection, None)
+        for key in list(self.selector.get_map().values()):
+            if key.data is connection:
+                self.selector.unregister(key.fileobj)
+                break
+        if connection in self._ready:
+            self._ready.remove(connection)
+
+    def _drain_wakeups(self) -> None:
+        try:
+            while self._wakeup_receiver.recv(1024):
+                pass
+        except (BlockingIOError, OSError):
+            pass
@@ -1,13 +1,15 @@
-import json
 import logging
 import time
+from collections import OrderedDict
 from queue import Queue, Empty
 from concurrent.futures.thread import ThreadPoolExecutor
 from logging import Logger
 from threading import Lock
 from typing import Dict, Union, Any, Optional, List, Callable
 
+from slack_sdk import json_codec
 from slack_sdk.errors import SlackApiError
+from slack_sdk.socket_mode.dispatcher import DispatchStats, PartitionedDispatcher
 from slack_sdk.socket_mode.interval_runner import IntervalRunner
 from slack_sdk.socket_mode.listeners import (
     WebSocketMessageListener,
@@ -37,9 +39,25 @@ class BaseSocketModeClient:
         ]
     ]
 
-    message_processor: IntervalRunner
+    message_processor: Optional[IntervalRunner]
     message_workers: ThreadPoolExecutor
 
+    # set in direct dispatch mode (see dispatch_message()) or to process messages in order by partition_key
+    dispatcher: Optional[PartitionedDispatcher] = None
+    # returns the key of a message; messages with the same key are processed in order
+    partition_key: Optional[Callable[[dict], Any]] = None
+    dispatch_stats: Optional[DispatchStats] = None
+    # envelope_id -> (received at, listeners started at) while the listeners run
+    dispatched_envelopes: Dict[str, tuple]
+
+    # set in auto acknowledge mode, see acknowledge_envelope()
+    auto_acknowledge: bool = False
+    # the recently acknowledged envelope_ids / event_ids, oldest first
+    acknowledged_envelopes: "OrderedDict[str, None]"
+    acknowledged_events: "OrderedDict[str, None]"
+    acknowledged_envelopes_lock: Lock
+    max_acknowledged_envelopes: int = 1000
+
     closed: bool
     connect_operation_lock: Lock
 
@@ -90,12 +108,100 @@ class BaseSocketModeClient:
     def send_socket_mode_response(
         self, response: Union[Dict[str, Any], SocketModeResponse]
     ) -> None:
+        envelope_id = (
+            response.envelope_id
+            if isinstance(response, SocketModeResponse)
+            else response.get("envelope_id")
+        )
+        if self.auto_acknowledge:
+            with self.acknowledged_envelopes_lock:
+                already_acknowledged = envelope_id in self.acknowledged_envelopes
+            if already_acknowledged:
+                if self.logger.level <= logging.DEBUG:
+                    self.logger.debug(
+                        f"Skipped a response to an acknowledged envelope (envelope_id: {envelope_id})"
+                    )
+                return
         if isinstance(response, SocketModeResponse):
-            self.send_message(json.dumps(response.to_dict()))
+            self.send_message(json_codec.dumps(response.to_dict()))
         else:
-            self.send_message(json.dumps(response))
+            self.send_message(json_codec.dumps(response))
+        if self.dispatch_stats is not None:
+            started = self.dispatched_envelopes.pop(envelope_id, None)
+            if started is not None:
+                sent_at = time.perf_counter()
+                self.dispatch_stats.ack.observe(sent_at - started[1])
+                self.dispatch_stats.total.observe(sent_at - started[0])
+
+    def acknowledge_envelope(
+        self,
+        message: dict,
+        received_at: Optional[float] = None,
+        parsed_at: Optional[float] = None,
+        submit: Optional[Callable[[], bool]] = None,
+    ) -> bool:
+        """Acknowledges an events_api envelope right after it is received (auto acknowledge mode).
+
+        Slack redelivers envelopes not acknowledged within 3 seconds, which can happen when the
+        listeners are busy. Responses the listeners send later for the same envelope are skipped.
+
+        Args:
+            message: The received message
+            received_at: time.perf_counter() when the message was read off the socket (direct dispatch mode)
+            parsed_at: time.perf_counter() when the message was parsed (direct dispatch mode)
+            submit: Queues the message for the listeners, returning False if it could not be queued;
+                the message is then not acknowledged, so that Slack delivers it again (direct dispatch mode)
+
+        Returns:
+            False if the message redelivers an event already acknowledged, and should be skipped
+            (or it could not be submitted)
+        """
+        envelope_id = message.get("envelope_id")
+        if message.get("type") != "events_api" or envelope_id is None:
+            return submit() if submit is not None else True
+        payload = message.get("payload")
+        event_id = payload.get("event_id") if isinstance(payload, dict) else None
+        with self.acknowledged_envelopes_lock:
+            redelivered = envelope_id in self.acknowledged_envelopes or (
+                event_id is not None and event_id in self.acknowledged_events
+            )
+            self._remember_acknowledged(self.acknowledged_envelopes, envelope_id)
+            if event_id is not None:
+                self._remember_acknowledged(self.acknowledged_events, event_id)
+        if not redelivered and submit is not None and not submit():
+            with self.acknowledged_envelopes_lock:
+                self.acknowledged_envelopes.pop(envelope_id, None)
+                if event_id is not None:
+                    self.acknowledged_events.pop(event_id, None)
+            self.logger.warning(
+                f"Left an envelope unacknowledged as it could not be queued (envelope_id: {envelope_id})"
+            )
+            return False
+        # a redelivery is acknowledged again, so that Slack stops retrying
+        self.send_message(json_codec.dumps({"envelope_id": envelope_id}))
+        if self.dispatch_stats is not None and received_at is not None:
+            # the listeners' responses are skipped, so their acks are measured here
+            sent_at = time.perf_counter()
+            self.dispatch_stats.ack.observe(sent_at - (parsed_at or received_at))
+            self.dispatch_stats.total.observe(sent_at - received_at)
+        if redelivered and self.logger.level <= logging.DEBUG:
+            self.logger.debug(
+                f"Skipped a redelivered envelope (envelope_id: {envelope_id}, event_id: {event_id}, "
+                f"retry_attempt: {message.get('retry_attempt')})"
+            )
+        return not redelivered
+
+    def _remember_acknowledged(self, ids: "OrderedDict[str, None]", key: str) -> None:
+        ids[key] = None
+        ids.move_to_end(key)
+        while len(ids) > self.max_acknowledged_envelopes:
+            ids.popitem(last=False)
 
     def enqueue_message(self, message: str):
+        if self.auto_acknowledge and message.startswith("{"):
+            # the listeners parse it again later; only envelope_id and the type matter here
+            if not self.acknowledge_envelope(json_codec.loads(message)):
+                return
         self.message_queue.put(message)
         if self.logger.level <= logging.DEBUG:
             self.logger.debug(
@@ -113,7 +219,7 @@ class BaseSocketModeClient:
             if raw_message is not None:
                 message: dict = {}
                 if raw_message.startswith("{"):
-                    message = json.loads(raw_message)
+                    message = json_codec.loads(raw_message)
                 if message.get("type") == "disconnect":
                     self.connect_to_new_endpoint(force=True)
                 else:
@@ -121,10 +227,71 @@ class BaseSocketModeClient:
                     def _run_message_listeners():
                         self.run_message_listeners(message, raw_message)
 
-                    self.message_workers.submit(_run_message_listeners)
+                    if self.dispatcher is not None:
+                        self.dispatcher.submit(
+                            self._partition_key_of(message), _run_message_listeners
+                        )
+                    else:
+                        self.message_workers.submit(_run_message_listeners)
         except Empty:
             pass
 
+    def dispatch_message(self, raw_message: str, received_at: Optional[float] = None) -> None:
+        """Parses a message on the receiving thread and hands it straight to a dispatcher worker.
+
+        This is used instead of enqueue_message() in direct dispatch mode. Messages with the same
+        partition_key go to the same worker; when its queue is full, the message is left unacknowledged
+        (auto acknowledge mode) or dropped, without blocking the receiving thread.
+
+        Args:
+            raw_message: The received text message
+            received_at: time.perf_counter() when the message was read off the socket
+        """
+        if received_at is None:
+            received_at = time.perf_counter()
+        message: dict = {}
+        if raw_message.startswith("{"):
+            message = json_codec.loads(raw_message)
+        parsed_at = time.perf_counter()
+        self.dispatch_stats.parse.observe(parsed_at - received_at)
+        if message.get("type") == "disconnect":
+            # reconnecting takes a while, not on the receiving thread
+            self.message_workers.submit(self.connect_to_new_endpoint, True)
+            return
+        envelope_id = message.get("envelope_id")
+
+        def _run_message_listeners():
+            started_at = time.perf_counter()
+            self.dispatch_stats.queue.observe(started_at - parsed_at)
+            if envelope_id is not None:
+                self.dispatched_envelopes[envelope_id] = (received_at, started_at)
+            try:
+                self.run_message_listeners(message, raw_message)
+            finally:
+                if envelope_id is not None:
+                    # not acknowledged by the listeners
+                    self.dispatched_envelopes.pop(envelope_id, None)
+
+        def _submit() -> bool:
+            return self.dispatcher.submit(
+                self._partition_key_of(message), _run_message_listeners
+            )
+
+        if self.auto_acknowledge:
+            # acknowledged once queued; when its lane is full, Slack delivers it again later
+            self.acknowledge_envelope(message, received_at, parsed_at, _submit)
+        else:
+            _submit()
+
+    def _partition_key_of(self, message: dict) -> Any:
+        if self.partition_key is None:
+            return message.get("envelope_id")
+        try:
+            return self.partition_key(message)
+        except Exception as e:
+            self.logger.exception(f"Failed to get the partition key of a message: {e}")
+            return message.get("envelope_id")
+
     def run_message_listeners(self, message: dict, raw_message: str) -> None:
         type, envelope_id = message.get("type"), message.get("envelope_id")
         if self.logger.level <= logging.DEBUG:
@@ -0,0 +1,236 @@
+"""Dispatch of Socket Mode envelopes and RTM events to a partitioned worker pool
+
+Messages with the same partition key (by default, the channel) are processed in order, by
+the same worker. In direct dispatch mode, instead of going through the message_queue and the
+polling message_processor thread, each envelope is parsed where it is received and handed
+straight to a worker.
+"""
+import bisect
+import logging
+from logging import Logger
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+class LatencyHistogram:
+    """A thread-safe histogram of latencies (in seconds) with fixed, roughly logarithmic buckets."""
+
+    # upper bounds of the buckets in seconds; the last bucket has no upper bound
+    DEFAULT_BOUNDS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    bounds: Sequence[float]
+    counts: List[int]
+    count: int
+    total: float
+    max: float
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS):
+        self.bounds = bounds
+        self._lock = Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, p: float) -> float:
+        """Returns the upper bound of the bucket holding the p-th percentile (0 < p <= 100)."""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            rank = self.count * p / 100
+            seen = 0
+            for i, bucket_count in enumerate(self.counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return self.bounds[i] if i < len(self.bounds) else self.max
+            return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "max": self.max,
+        }
+
+
+class DispatchStats:
+    """Per-stage latency histograms of dispatched envelopes.
+
+    receive -> parse -> listener start -> ack sent
+    """
+
+    # from reading the frame off the socket to the parsed envelope
+    parse: LatencyHistogram
+    # from the parsed envelope to a worker starting its listeners (time spent queued)
+    queue: LatencyHistogram
+    # from the listeners starting to the ack (send_socket_mode_response) being sent;
+    # in auto acknowledge mode, from the parsed envelope to the ack being sent
+    ack: LatencyHistogram
+    # from reading the frame off the socket to the ack being sent
+    total: LatencyHistogram
+
+    def __init__(self):
+        self.parse = LatencyHistogram()
+        self.queue = LatencyHistogram()
+        self.ack = LatencyHistogram()
+        self.total = LatencyHistogram()
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            "parse": self.parse.to_dict(),
+            "queue": self.queue.to_dict(),
+            "ack": self.ack.to_dict(),
+            "total": self.total.to_dict(),
+        }
+
+
+def channel_partition_key(message: dict) -> Any:
+    """The default partition key of a Socket Mode envelope or RTM event: its channel.
+
+    Events in the same channel are then processed in the order received, while different
+    channels are processed in parallel. Messages without a channel fall back to envelope_id.
+    """
+    event = message
+    payload = message.get("payload")
+    if isinstance(payload, dict):
+        event = payload.get("event") or payload
+    channel = event.get("channel") or event.get("channel_id")
+    if channel is None and isinstance(event.get("item"), dict):
+        # reaction_added, pin_added and the like
+        channel = event["item"].get("channel")
+    if isinstance(channel, dict):
+        # channel_created, block_actions and the like
+        channel = channel.get("id")
+    if channel is not None:
+        return channel
+    return message.get("envelope_id")
+
+
+class PartitionedDispatcher:
+    """A fixed pool of worker threads, each with its own bounded queue.
+
+    A task goes to the worker (lane) picked by its partition key, so tasks with the same key run
+    in the order submitted, while the lanes run in parallel. When that worker's queue is full, submit() blocks (up to
+    `put_timeout`), which stops the receiving thread from reading more off the socket. With a `put_timeout` of 0,
+    it returns False right away, and the caller decides what to do with the task.
+    """
+
+    logger: Logger
+    dropped_count: int
+    # per lane: the most tasks ever queued, and the tasks run
+    max_queue_depths: List[int]
+    completed_counts: List[int]
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_queue_size: int = 1000,
+        put_timeout: Optional[float] = 10,
+        logger: Optional[Logger] = None,
+        thread_name_prefix: str = "Socket Mode worker",
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.put_timeout = put_timeout
+        self.dropped_count = 0
+        workers = max(1, workers)
+        self.max_queue_depths = [0] * workers
+        self.completed_counts = [0] * workers
+        self._queues: List[Queue] = [
+            Queue(maxsize=max(1, max_queue_size // workers)) for _ in range(workers)
+        ]
+        self._workers = [
+            Thread(
+                target=self._run,
+                args=(i, queue),
+                name=f"{thread_name_prefix} {i}",
+                daemon=True,
+            )
+            for i, queue in enumerate(self._queues)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, key: Any, task: Callable[[], None]) -> bool:
+        """Queues a task; returns False if it was dropped as the queue stayed full."""
+        lane = hash(key) % len(self._queues)
+        queue = self._queues[lane]
+        try:
+            if self.put_timeout == 0:
+                queue.put_nowait(task)
+            else:
+                queue.put(task, timeout=self.put_timeout)
+            depth = queue.qsize()
+            if depth > self.max_queue_depths[lane]:
+                self.max_queue_depths[lane] = depth
+            return True
+        except Full:
+            self.dropped_count += 1
+            self.logger.error(
+                f"Could not queue a message as its dispatch lane is full ({self.dropped_count} so far)"
+            )
+            return False
+
+    def queue_depths(self) -> List[int]:
+        return [queue.qsize() for queue in self._queues]
+
+    def lane_stats(self) -> List[Dict[str, int]]:
+        return [
+            {
+                "depth": queue.qsize(),
+                "max_depth": self.max_queue_depths[i],
+                "completed": self.completed_counts[i],
+            }
+            for i, queue in enumerate(self._queues)
+        ]
+
+    def shutdown(self, timeout: float = 5) -> None:
+        """Stops the workers once they have run the queued tasks.
+
+        A lane still full after `timeout` seconds has its remaining tasks dropped, so that
+        shutting down never blocks for good.
+        """
+        for queue in self._queues:
+            try:
+                queue.put(None, timeout=timeout)
+            except Full:
+                dropped = 0
+                while True:
+                    try:
+                        queue.get_nowait()
+                        dropped += 1
+                    except Empty:
+                        break
+                self.dropped_count += dropped
+                self.logger.warning(
+                    f"Dropped {dropped} queued Socket Mode messages while shutting down"
+                )
+                queue.put_nowait(None)
+        for worker in self._workers:
+            worker.join(timeout)
+
+    def _run(self, lane: int, queue: Queue) -> None:
+        while True:
+            task = queue.get()
+            if task is None:
+                return
+            try:
+                task()
+            except Exception as e:
+                self.logger.exception(f"Failed to run a dispatched task: {e}")
+            finally:
+                self.completed_counts[lane] += 1
@@ -1,12 +1,11 @@
 """A Python module for interacting with Slack's Web API."""
 
-import copy
 import hashlib
 import hmac
 import io
 import json
 import logging
-import mimetypes
+import time
 import urllib
 import uuid
 import warnings
@@ -20,6 +19,7 @@ from urllib.parse import urlencode
 from urllib.request import Request, urlopen, OpenerDirector, ProxyHandler, HTTPSHandler
 
 import slack_sdk.errors as err
+from slack_sdk import json_codec
 from slack_sdk.errors import SlackRequestError
 from .deprecation import show_2020_01_deprecation
 from .internal_utils import (
@@ -28,7 +28,15 @@ from .internal_utils import (
     _get_url,
     _build_req_args,
     _build_unexpected_body_error_message,
+    _read_response_body,
+    _decode_response_body,
+    _is_utf8,
+    _ACCEPT_ENCODING,
 )
+from .connection_pool import ConnectionPool
+from .multipart import MultipartBody
+from .rate_limiter import RateLimiter
+from .response_cache import ResponseCache
 from .slack_response import SlackResponse
 from slack_sdk.http_retry import default_retry_handlers
 from slack_sdk.http_retry.handler import RetryHandler
@@ -55,6 +63,10 @@ class BaseClient:
         team_id: Optional[str] = None,
         logger: Optional[logging.Logger] = None,
         retry_handlers: Optional[List[RetryHandler]] = None,
+        connection_pool: Optional[ConnectionPool] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        lazy_response: bool = False,
+        response_cache: Optional[ResponseCache] = None,
     ):
         self.token = None if token is None else token.strip()
         self.base_url = base_url
@@ -73,6 +85,17 @@ class BaseClient:
         self.retry_handlers = (
             retry_handlers if retry_handlers is not None else default_retry_handlers()
         )
+        # When a pool is given, keep-alive connections are reused across API calls
+        self.connection_pool = connection_pool
+        if self.connection_pool is not None and self.connection_pool.ssl is None:
+            self.connection_pool.ssl = self.ssl
+        # When a rate limiter is given, requests wait for their turn before being sent
+        self.rate_limiter = rate_limiter
+        # When enabled, response bodies are parsed only when the data is first accessed;
+        # "ok" alone is read off the start of the body
+        self.lazy_response = lazy_response
+        # When a cache is given, the responses of its read-only methods are reused for a while
+        self.response_cache = response_cache
 
         if self.proxy is None or len(self.proxy.strip()) == 0:
             env_variable = load_http_proxy_from_env(self._logger)
@@ -142,7 +165,35 @@ class BaseClient:
         )
 
         show_2020_01_deprecation(api_method)
-        return self._sync_send(api_url=api_url, req_args=req_args)
+        cache_args = None
+        if (
+            self.response_cache is not None
+            and files is None
+            and auth is None
+            and self.response_cache.is_cacheable(api_method)
+        ):
+            cache_args = {}
+            for values in (params, data, json):
+                if isinstance(values, dict):
+                    cache_args.update(values)
+            cached = self.response_cache.get(self, api_method, cache_args)
+            if cached is not None:
+                return cached
+
+        started = time.monotonic()
+        if self.rate_limiter is not None:
+            channel = None
+            for values in (json, data, params):
+                if isinstance(values, dict) and values.get("channel"):
+                    channel = values["channel"]
+                    break
+            self.rate_limiter.acquire(api_method, channel)
+        response = self._sync_send(api_url=api_url, req_args=req_args)
+        if cache_args is not None:
+            self.response_cache.put(
+                api_method, cache_args, response, time.monotonic() - started
+            )
+        return response
 
     # =================================================================
     # urllib based WebClient
@@ -199,11 +250,13 @@ class BaseClient:
           for response in client.conversations_list(limit=100):
               # do something with each response here
         """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire(api_url.split("/")[-1])
         response = self._perform_urllib_http_request(url=api_url, args=req_args)
         return {
             "status_code": int(response["status"]),
             "headers": dict(response["headers"]),
-            "data": json.loads(response["body"]),
+            "data": json_codec.loads(response["body"]),
         }
 
     def _urllib_api_call(
@@ -297,18 +350,24 @@ class BaseClient:
             response = self._perform_urllib_http_request(url=url, args=request_args)
             response_body = response.get("body", None)  # skipcq: PTC-W0039
             response_body_data: Optional[Union[dict, bytes]] = response_body
-            if response_body is not None and not isinstance(response_body, bytes):
+            lazy = (
+                self.lazy_response
+                and response_body is not None
+                and not response.get("binary", False)
+            )
+            if lazy:
+                response_body_data = None
+            elif response_body is not None and not response.get("binary", False):
                 try:
-                    response_body_data = json.loads(response["body"])
-                except json.decoder.JSONDecodeError:
+                    response_body_data = json_codec.loads(response_body)
+                except ValueError:
                     message = _build_unexpected_body_error_message(
-                        response.get("body", "")
+                        _decode_response_body(response)
                     )
                     raise err.SlackApiError(message, response)
 
-            all_params: Dict[str, Any] = (
-                copy.copy(body_params) if body_params is not None else {}
-            )
+            # body_params is a new dict made by convert_bool_to_0_or_1 above
+            all_params: Dict[str, Any] = body_params if body_params is not None else {}
             if query_params:
                 all_params.update(query_params)
             request_args["params"] = all_params  # for backward-compatibility
@@ -319,8 +378,10 @@ class BaseClient:
                 api_url=url,
                 req_args=request_args,
                 data=response_body_data,
-                headers=dict(response["headers"]),
+                # converted to a dict on first access
+                headers=response["headers"],
                 status_code=response["status"],
+                body=response_body if lazy else None,
             ).validate()
         finally:
             for f in files_to_close:
@@ -341,51 +402,18 @@ class BaseClient:
                 "json": Dict[str, Any],
 
         Returns:
-            dict {status: int, headers: Headers, body: str}
+            dict {status: int, headers: Headers, body: Union[str, bytes], binary: bool}
         """
         headers = args["headers"]
         if args["json"]:
-            body = json.dumps(args["json"])
+            body = json_codec.dumps(args["json"])
             headers["Content-Type"] = "application/json;charset=utf-8"
         elif args["data"]:
             boundary = f"--------------{uuid.uuid4()}"
-            sep_boundary = b"\r\n--" + boundary.encode("ascii")
-            end_boundary = sep_boundary + b"--\r\n"
-            body = io.BytesIO()
-            data = args["data"]
-            for key, value in data.items():
-                readable = getattr(value, "readable", None)
-                if readable and value.readable():
-                    filename = "Uploaded file"
-                    name_attr = getattr(value, "name", None)
-                    if name_attr:
-                        filename = (
-                            name_attr.decode("utf-8")
-                            if isinstance(name_attr, bytes)
-                            else name_attr
-                        )
-                    if "filename" in data:
-                        filename = data["filename"]
-                    mimetype = (
-                        mimetypes.guess_type(filename)[0] or "application/octet-stream"
-                    )
-                    title = (
-                        f'\r\nContent-Disposition: form-data; name="{key}"; filename="{filename}"\r\n'
-                        + f"Content-Type: {mimetype}\r\n"
-                    )
-                    value = value.read()
-                else:
-                    title = f'\r\nContent-Disposition: form-data; name="{key}"\r\n'
-                    value = str(value).encode("utf-8")
-                body.write(sep_boundary)
-                body.write(title.encode("utf-8"))
-                body.write(b"\r\n")
-                body.write(value)
-
-            body.write(end_boundary)
-            body = body.getvalue()
+            # file contents are streamed from disk while sending, not loaded into memory
+            body = MultipartBody(args["data"], boundary)
             headers["Content-Type"] = f"multipart/form-data; boundary={boundary}"
-            headers["Content-Length"] = len(body)
+            headers["Content-Length"] = body.content_length
         elif args["params"]:
             body = urlencode(args["params"])
             headers["Content-Type"] = "application/x-www-form-urlencoded"
@@ -407,6 +435,8 @@ class BaseClient:
             counter_for_safety += 1
             # If this is a retry, the next try started here. We can reset the flag.
             retry_state.next_attempt_requested = False
+            if isinstance(body, MultipartBody):
+                body.rewind()
 
             try:
                 resp = self._perform_urllib_http_request_internal(url, req)
@@ -433,10 +463,15 @@ class BaseClient:
                         response_headers["Retry-After"] = response_headers[
                             "retry-after"
                         ]
+                    if self.rate_limiter is not None:
+                        # make the other requests by this client wait as well
+                        self.rate_limiter.pause(
+                            int(response_headers.get("Retry-After", "1"))
+                        )
 
                 # read the response body here
                 charset = e.headers.get_content_charset() or "utf-8"
-                response_body: str = e.read().decode(charset)
+                response_body: str = _read_response_body(e).decode(charset)
                 resp["body"] = response_body
 
                 # Try to find a retry handler for this error
@@ -533,13 +568,15 @@ class BaseClient:
             resp: Optional[HTTPResponse] = None
             if opener:
                 resp = opener.open(req, timeout=self.timeout)  # skipcq: BAN-B310
+            elif self.connection_pool is not None:
+                resp = self.connection_pool.urlopen(req, timeout=self.timeout)
             else:
                 resp = urlopen(  # skipcq: BAN-B310
                     req, context=self.ssl, timeout=self.timeout
                 )
             if resp.headers.get_content_type() == "application/gzip":
                 # admin.analytics.getFile
-                body: bytes = resp.read()
+                body: bytes = _read_response_body(resp)
                 if self._logger.level <= logging.DEBUG:
                     self._logger.debug(
                         "Received the following response - "
@@ -547,16 +584,24 @@ class BaseClient:
                         f"headers: {dict(resp.headers)}, "
                         f"body: (binary)"
                     )
-                return {"status": resp.code, "headers": resp.headers, "body": body}
+                return {
+                    "status": resp.code,
+                    "headers": resp.headers,
+                    "body": body,
+                    "binary": True,
+                }
 
             charset = resp.headers.get_content_charset() or "utf-8"
-            body: str = resp.read().decode(charset)  # read the response body here
+            # read the response body here; the JSON codec decodes UTF-8 bytes without a str copy
+            body: Union[str, bytes] = _read_response_body(resp)
+            if not _is_utf8(charset):
+                body = body.decode(charset)
             if self._logger.level <= logging.DEBUG:
                 self._logger.debug(
                     "Received the following response - "
                     f"status: {resp.code}, "
                     f"headers: {dict(resp.headers)}, "
-                    f"body: {body}"
+                    f"body: {_decode_response_body({'body': body})}"
                 )
             return {"status": resp.code, "headers": resp.headers, "body": body}
         raise SlackRequestError(f"Invalid URL detected: {url}")
@@ -564,7 +609,10 @@ class BaseClient:
     def _build_urllib_request_headers(
         self, token: str, has_json: bool, has_files: bool, additional_headers: dict
     ) -> Dict[str, str]:
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Accept-Encoding": _ACCEPT_ENCODING,
+        }
         headers.update(self.headers)
         if token:
             headers.update({"Authorization": "Bearer {}".format(token)})
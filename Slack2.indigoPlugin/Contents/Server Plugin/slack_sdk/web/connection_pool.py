@@ -0,0 +1,312 @@
+"""Keep-alive HTTP(S) connection pooling for the urllib based WebClient.
+
+`urllib.request.urlopen` opens a new TCP (and TLS) connection for every request.
+This module keeps `http.client` connections open per host so that subsequent
+Web API calls can reuse them.
+
+  from slack_sdk import WebClient
+  from slack_sdk.web.connection_pool import ConnectionPool
+
+  client = WebClient(token=token, connection_pool=ConnectionPool())
+"""
+import io
+import logging
+import socket
+import time
+from collections import deque
+from http.client import (
+    HTTPConnection,
+    HTTPResponse,
+    HTTPSConnection,
+    HTTPMessage,
+    RemoteDisconnected,
+)
+from logging import Logger
+from ssl import SSLContext
+from threading import Lock
+from typing import BinaryIO, Callable, Deque, Dict, Optional, Tuple, Union
+from urllib.error import HTTPError
+from urllib.parse import urlsplit
+from urllib.request import Request
+
+from slack_sdk.errors import SlackRequestError
+
+
+class PooledHTTPResponse:
+    """A response being read off a pooled connection, compatible with the parts of
+    `http.client.HTTPResponse` that the WebClient uses.
+
+    The body is read (and decompressed, see _read_response_body) as it arrives. Once all
+    of it has been read, the connection goes back to the pool.
+    """
+
+    code: int
+    status: int
+    headers: HTTPMessage
+    url: str
+
+    def __init__(
+        self,
+        *,
+        url: str,
+        response: HTTPResponse,
+        release: Callable[[bool], None],
+    ):
+        self.url = url
+        self.code = response.status
+        self.status = response.status
+        self.headers = response.headers
+        self._response = response
+        # release(reusable) returns the connection to the pool, or closes it
+        self._release = release
+        self._released = False
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        try:
+            data = self._response.read() if amt is None else self._response.read(amt)
+        except BaseException:
+            self._done(reusable=False)
+            raise
+        if self._response.isclosed():
+            # http.client closes the response once the whole body has been read
+            self._done(reusable=True)
+        return data
+
+    def getcode(self) -> int:
+        return self.code
+
+    def close(self) -> None:
+        # a connection with unread data left on it can't be reused
+        self._done(reusable=self._response.isclosed())
+
+    def _done(self, reusable: bool) -> None:
+        if not self._released:
+            self._released = True
+            self._release(reusable)
+
+
+class _PooledConnection:
+    connection: HTTPConnection
+    last_used_at: float
+    request_count: int
+
+    def __init__(self, connection: HTTPConnection):
+        self.connection = connection
+        self.last_used_at = time.time()
+        self.request_count = 0
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive connections, keyed by (scheme, host, port).
+
+    Idle connections are closed once they have been unused for
+    `idle_timeout` seconds. When a reused connection turns out to be
+    reset by the server, the request is sent again over a new connection.
+    """
+
+    maxsize: int
+    idle_timeout: float
+    ssl: Optional[SSLContext]
+    logger: Logger
+
+    # errors that indicate the server silently closed a kept-alive connection
+    RECONNECT_ERRORS = (
+        RemoteDisconnected,
+        ConnectionResetError,
+        ConnectionAbortedError,
+        BrokenPipeError,
+    )
+
+    def __init__(
+        self,
+        *,
+        maxsize: int = 4,
+        idle_timeout: float = 60,
+        ssl: Optional[SSLContext] = None,
+        logger: Optional[Logger] = None,
+    ):
+        """Keep-alive connection pool
+
+        Args:
+            maxsize: the max number of idle connections kept per host (default: 4)
+            idle_timeout: seconds after which an idle connection is closed (default: 60)
+            ssl: the SSLContext for HTTPS connections
+            logger: Custom logger
+        """
+        self.maxsize = maxsize
+        self.idle_timeout = idle_timeout
+        self.ssl = ssl
+        self.logger = logger or logging.getLogger(__name__)
+        self._idle: Dict[Tuple[str, str, int], Deque[_PooledConnection]] = {}
+        self._lock = Lock()
+        self._closed = False
+        # statistics
+        self.created_count = 0
+        self.reused_count = 0
+        self.reconnected_count = 0
+        self.evicted_count = 0
+
+    def urlopen(self, req: Request, timeout: Optional[float] = None) -> PooledHTTPResponse:
+        """Sends the request over a pooled connection.
+
+        The connection is returned to the pool once the response body has been read
+        to the end; close() a response that is not read fully.
+
+        Raises:
+            HTTPError: for non-2xx responses, like urllib.request.urlopen does
+        """
+        parsed = urlsplit(req.full_url)
+        scheme = parsed.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise SlackRequestError(f"Invalid URL detected: {req.full_url}")
+        port = parsed.port or (443 if scheme == "https" else 80)
+        key = (scheme, parsed.hostname, port)
+        path = parsed.path or "/"
+        if parsed.query:
+            path = f"{path}?{parsed.query}"
+        headers = dict(req.header_items())
+
+        pooled, reused = self._checkout(key, timeout)
+        try:
+            resp = self._send(pooled, req.get_method(), path, req.data, headers)
+        except self.RECONNECT_ERRORS as e:
+            pooled.connection.close()
+            if not reused or not self._rewind(req.data):
+                raise
+            # The server closed the kept-alive connection; try once more on a new one
+            self.reconnected_count += 1
+            if self.logger.level <= logging.DEBUG:
+                self.logger.debug(
+                    f"Reconnecting as a pooled connection was reset (host: {key[1]}, error: {e})"
+                )
+            pooled = self._new_connection(key, timeout)
+            try:
+                resp = self._send(pooled, req.get_method(), path, req.data, headers)
+            except BaseException:
+                pooled.connection.close()
+                raise
+        except BaseException:
+            pooled.connection.close()
+            raise
+
+        def release(reusable: bool) -> None:
+            pooled.last_used_at = time.time()
+            if reusable and not resp.will_close:
+                self._checkin(key, pooled)
+            else:
+                pooled.connection.close()
+
+        if not 200 <= resp.status < 300:
+            try:
+                # error bodies are small; the body must be consumed before reusing the connection
+                body = resp.read()
+            except BaseException:
+                release(False)
+                raise
+            release(True)
+            raise HTTPError(
+                req.full_url, resp.status, str(resp.status), resp.headers, io.BytesIO(body)
+            )
+        return PooledHTTPResponse(url=req.full_url, response=resp, release=release)
+
+    def clear(self) -> None:
+        """Closes all the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for pooled in connections:
+                pooled.connection.close()
+
+    def close(self) -> None:
+        """Closes all the idle connections. After this, new connections won't be pooled."""
+        self._closed = True
+        self.clear()
+
+    def evict_idle_connections(self) -> int:
+        """Closes the connections that have been idle longer than idle_timeout."""
+        expired = []
+        now = time.time()
+        with self._lock:
+            for connections in self._idle.values():
+                while connections and now - connections[0].last_used_at > self.idle_timeout:
+                    expired.append(connections.popleft())
+            self.evicted_count += len(expired)
+        for pooled in expired:
+            pooled.connection.close()
+        return len(expired)
+
+    def idle_connection_count(self) -> int:
+        with self._lock:
+            return sum(len(c) for c in self._idle.values())
+
+    # --------------------------------------------------------------
+
+    def _send(
+        self,
+        pooled: _PooledConnection,
+        method: str,
+        path: str,
+        body: Union[bytes, BinaryIO, None],
+        headers: Dict[str, str],
+    ) -> HTTPResponse:
+        connection = pooled.connection
+        connection.request(method, path, body=body, headers=headers)
+        resp = connection.getresponse()
+        pooled.last_used_at = time.time()
+        pooled.request_count += 1
+        return resp
+
+    @staticmethod
+    def _rewind(body) -> bool:
+        """Moves a streamed request body back to its start; returns False if it can't be resent."""
+        if body is None or isinstance(body, (bytes, bytearray)):
+            return True
+        if hasattr(body, "rewind"):
+            # MultipartBody
+            body.rewind()
+            return True
+        seekable = getattr(body, "seekable", None)
+        if seekable is not None and seekable():
+            body.seek(0)
+            return True
+        return False
+
+    def _checkout(
+        self, key: Tuple[str, str, int], timeout: Optional[float]
+    ) -> Tuple[_PooledConnection, bool]:
+        self.evict_idle_connections()
+        with self._lock:
+            connections = self._idle.get(key)
+            pooled = connections.pop() if connections else None
+        if pooled is not None:
+            self.reused_count += 1
+            pooled.connection.timeout = timeout
+            if pooled.connection.sock is not None:
+                pooled.connection.sock.settimeout(timeout)
+            return pooled, True
+        return self._new_connection(key, timeout), False
+
+    def _checkin(self, key: Tuple[str, str, int], pooled: _PooledConnection) -> None:
+        with self._lock:
+            if not self._closed:
+                connections = self._idle.setdefault(key, deque())
+                if len(connections) < self.maxsize:
+                    connections.append(pooled)
+                    return
+        pooled.connection.close()
+
+    def _new_connection(
+        self, key: Tuple[str, str, int], timeout: Optional[float]
+    ) -> _PooledConnection:
+        scheme, host, port = key
+        self.created_count += 1
+        if scheme == "https":
+            connection = HTTPSConnection(
+                host, port, timeout=timeout or socket.getdefaulttimeout(), context=self.ssl
+            )
+        else:
+            connection = HTTPConnection(
+                host, port, timeout=timeout or socket.getdefaulttimeout()
+            )
+        return _PooledConnection(connection)
+
@@ -3,6 +3,7 @@ import os
 import platform
 import sys
 import warnings
+import zlib
 from ssl import SSLContext
 from typing import Dict, Union, Optional, Any, Sequence
 from urllib.parse import urljoin
@@ -290,3 +291,62 @@ def _remove_none_values(d: dict) -> dict:
     # '{"a": null, "b": 123}'
     #
     return {k: v for k, v in d.items() if v is not None}
+
+
+# The response encodings _read_response_body() can decompress
+_ACCEPT_ENCODING = "gzip, deflate"
+
+
+def _read_response_body(resp, chunk_size: int = 64 * 1024) -> bytes:
+    """Reads the whole body of a urllib response (or HTTPError).
+
+    A body sent with Content-Encoding: gzip or deflate is decompressed chunk by chunk
+    as it is read, instead of after reading all of it. With a ConnectionPool, the chunks
+    come straight off the connection. The response is closed if reading it fails.
+    """
+    encoding = (resp.headers.get("Content-Encoding") or "").strip().lower()
+    try:
+        if encoding not in ("gzip", "x-gzip", "deflate"):
+            return resp.read()
+        decompressor = None
+        chunks = []
+        while True:
+            chunk = resp.read(chunk_size)
+            if not chunk:
+                break
+            if decompressor is None:
+                if encoding == "deflate" and not _is_zlib_header(chunk):
+                    # some servers send raw deflate data without the zlib wrapper
+                    decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                else:
+                    decompressor = zlib.decompressobj(
+                        16 + zlib.MAX_WBITS if encoding != "deflate" else zlib.MAX_WBITS
+                    )
+            chunks.append(decompressor.decompress(chunk))
+        if decompressor is not None:
+            chunks.append(decompressor.flush())
+        return b"".join(chunks)
+    except BaseException:
+        resp.close()
+        raise
+
+
+def _is_utf8(charset: str) -> bool:
+    return charset.lower().replace("-", "").replace("_", "") == "utf8"
+
+
+def _decode_response_body(response: Dict[str, Any]) -> str:
+    # for logging and error messages; JSON bodies are kept as UTF-8 bytes
+    body = response.get("body") or ""
+    if isinstance(body, bytes):
+        return body.decode("utf-8", errors="replace")
+    return body
+
+
+def _is_zlib_header(data: bytes) -> bool:
+    # https://datatracker.ietf.org/doc/html/rfc1950#section-2.2
+    return (
+        len(data) >= 2
+        and data[0] & 0x0F == 8
+        and ((data[0] << 8) | data[1]) % 31 == 0
+    )
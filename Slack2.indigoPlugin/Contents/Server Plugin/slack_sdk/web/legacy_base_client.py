@@ -23,6 +23,7 @@ import aiohttp
 from aiohttp import FormData, BasicAuth
 
 import slack_sdk.errors as err
+from slack_sdk import json_codec
 from slack_sdk.errors import SlackRequestError
 from .async_internal_utils import _files_to_data, _get_event_loop, _request_with_session
 from .deprecation import show_2020_01_deprecation
@@ -32,6 +33,10 @@ from .internal_utils import (
     _get_url,
     _build_req_args,
     _build_unexpected_body_error_message,
+    _read_response_body,
+    _decode_response_body,
+    _is_utf8,
+    _ACCEPT_ENCODING,
 )
 from .legacy_slack_response import LegacySlackResponse as SlackResponse
 from ..proxy_env_variable_loader import load_http_proxy_from_env
@@ -277,7 +282,7 @@ class LegacyBaseClient:
         return {
             "status_code": int(response["status"]),
             "headers": dict(response["headers"]),
-            "data": json.loads(response["body"]),
+            "data": json_codec.loads(response["body"]),
         }
 
     def _urllib_api_call(
@@ -370,12 +375,12 @@ class LegacyBaseClient:
             response = self._perform_urllib_http_request(url=url, args=request_args)
             body = response.get("body", None)  # skipcq: PTC-W0039
             response_body_data: Optional[Union[dict, bytes]] = body
-            if body is not None and not isinstance(body, bytes):
+            if body is not None and not response.get("binary", False):
                 try:
-                    response_body_data = json.loads(response["body"])
-                except json.decoder.JSONDecodeError:
+                    response_body_data = json_codec.loads(body)
+                except ValueError:
                     message = _build_unexpected_body_error_message(
-                        response.get("body", "")
+                        _decode_response_body(response)
                     )
                     raise err.SlackApiError(message, response)
 
@@ -419,7 +424,7 @@ class LegacyBaseClient:
         """
         headers = args["headers"]
         if args["json"]:
-            body = json.dumps(args["json"])
+            body = json_codec.dumps(args["json"])
             headers["Content-Type"] = "application/json;charset=utf-8"
         elif args["data"]:
             boundary = f"--------------{uuid.uuid4()}"
@@ -500,11 +505,19 @@ class LegacyBaseClient:
                     )
                 if resp.headers.get_content_type() == "application/gzip":
                     # admin.analytics.getFile
-                    body: bytes = resp.read()
-                    return {"status": resp.code, "headers": resp.headers, "body": body}
+                    body: bytes = _read_response_body(resp)
+                    return {
+                        "status": resp.code,
+                        "headers": resp.headers,
+                        "body": body,
+                        "binary": True,
+                    }
 
                 charset = resp.headers.get_content_charset() or "utf-8"
-                body: str = resp.read().decode(charset)  # read the response body here
+                # read the response body here; the JSON codec decodes UTF-8 bytes without a str copy
+                body: Union[str, bytes] = _read_response_body(resp)
+                if not _is_utf8(charset):
+                    body = body.decode(charset)
                 return {"status": resp.code, "headers": resp.headers, "body": body}
             raise SlackRequestError(f"Invalid URL detected: {url}")
         except HTTPError as e:
@@ -526,7 +539,7 @@ class LegacyBaseClient:
 
             # read the response body here
             charset = e.headers.get_content_charset() or "utf-8"
-            body: str = e.read().decode(charset)
+            body: str = _read_response_body(e).decode(charset)
             resp["body"] = body
             return resp
 
@@ -537,7 +550,10 @@ class LegacyBaseClient:
     def _build_urllib_request_headers(
         self, token: str, has_json: bool, has_files: bool, additional_headers: dict
     ) -> Dict[str, str]:
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Accept-Encoding": _ACCEPT_ENCODING,
+        }
         headers.update(self.headers)
         if token:
             headers.update({"Authorization": "Bearer {}".format(token)})
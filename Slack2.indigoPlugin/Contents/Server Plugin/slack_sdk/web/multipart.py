@@ -0,0 +1,121 @@
+"""Streaming multipart/form-data request bodies.
+
+Instead of building the whole request body in memory, a MultipartBody sends
+the form fields and the file contents in chunks as http.client reads it.
+"""
+import io
+import mimetypes
+import os
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+
+class MultipartBody(io.RawIOBase):
+    """A readable multipart/form-data body that streams file contents from disk.
+
+    The whole body length is known up front (Content-Length), and
+    `rewind()` allows the same body to be sent again when retrying.
+    """
+
+    boundary: str
+    content_length: int
+
+    def __init__(self, data: Dict[str, Any], boundary: str):
+        super().__init__()
+        self.boundary = boundary
+        # each part is either bytes or a (file, start offset, size) tuple
+        self._parts: List[Union[bytes, tuple]] = []
+        sep_boundary = b"\r\n--" + boundary.encode("ascii")
+        end_boundary = sep_boundary + b"--\r\n"
+        for key, value in data.items():
+            readable = getattr(value, "readable", None)
+            if readable and value.readable():
+                filename = "Uploaded file"
+                name_attr = getattr(value, "name", None)
+                if name_attr and isinstance(name_attr, (str, bytes)):
+                    filename = (
+                        name_attr.decode("utf-8")
+                        if isinstance(name_attr, bytes)
+                        else name_attr
+                    )
+                if "filename" in data:
+                    filename = data["filename"]
+                mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+                title = (
+                    f'\r\nContent-Disposition: form-data; name="{key}"; filename="{filename}"\r\n'
+                    + f"Content-Type: {mimetype}\r\n"
+                )
+                self._parts.append(sep_boundary + title.encode("utf-8") + b"\r\n")
+                self._parts.append(self._file_part(value))
+            else:
+                title = f'\r\nContent-Disposition: form-data; name="{key}"\r\n'
+                self._parts.append(
+                    sep_boundary
+                    + title.encode("utf-8")
+                    + b"\r\n"
+                    + str(value).encode("utf-8")
+                )
+        self._parts.append(end_boundary)
+        self.content_length = sum(
+            len(p) if isinstance(p, bytes) else p[2] for p in self._parts
+        )
+        self.rewind()
+
+    @staticmethod
+    def _file_part(f: BinaryIO) -> Union[bytes, tuple]:
+        try:
+            start = f.tell()
+            size = os.fstat(f.fileno()).st_size - start
+            return (f, start, size)
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            pass
+        try:
+            start = f.tell()
+            size = f.seek(0, io.SEEK_END) - start
+            f.seek(start)
+            return (f, start, size)
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            # not seekable; this one has to be read into memory
+            return f.read()
+
+    def rewind(self) -> None:
+        """Starts over from the beginning of the body."""
+        self._index = 0
+        self._offset = 0
+        for part in self._parts:
+            if not isinstance(part, bytes):
+                part[0].seek(part[1])
+
+    def readable(self) -> bool:
+        return True
+
+    def __len__(self) -> int:
+        return self.content_length
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.content_length
+        chunks = []
+        while size > 0 and self._index < len(self._parts):
+            part = self._parts[self._index]
+            if isinstance(part, bytes):
+                chunk = part[self._offset : self._offset + size]
+            else:
+                f, _, part_size = part
+                chunk = f.read(min(size, part_size - self._offset))
+                if not chunk and self._offset < part_size:
+                    raise IOError(
+                        f"The file was truncated while uploading ({self._offset}/{part_size} bytes sent)"
+                    )
+            part_size = len(part) if isinstance(part, bytes) else part[2]
+            self._offset += len(chunk)
+            size -= len(chunk)
+            chunks.append(chunk)
+            if self._offset >= part_size:
+                self._index += 1
+                self._offset = 0
+        return b"".join(chunks)
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[: len(data)] = data
+        return len(data)
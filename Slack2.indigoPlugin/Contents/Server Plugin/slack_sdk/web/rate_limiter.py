@@ -0,0 +1,254 @@
+"""Client-side rate limiting for the Web API.
+
+Slack assigns every Web API method to a rate limit tier, and some chat methods
+are additionally limited per channel (about one message per second).
+https://api.slack.com/docs/rate-limits
+
+Instead of sending requests until Slack responds with HTTP 429, a RateLimiter
+makes callers wait for their turn using token buckets:
+
+  from slack_sdk import WebClient
+  from slack_sdk.web.rate_limiter import RateLimiter
+
+  client = WebClient(token=token, rate_limiter=RateLimiter())
+"""
+import logging
+import time
+from logging import Logger
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+TIER_1 = "tier1"
+TIER_2 = "tier2"
+TIER_3 = "tier3"
+TIER_4 = "tier4"
+SPECIAL_PER_CHANNEL = "per_channel"
+
+# tier -> (requests per minute, burst size)
+DEFAULT_TIER_LIMITS: Dict[str, Tuple[float, int]] = {
+    TIER_1: (1, 1),
+    TIER_2: (20, 5),
+    TIER_3: (50, 10),
+    TIER_4: (100, 20),
+    # chat.postMessage and friends: 1 message per second per channel, short bursts allowed
+    SPECIAL_PER_CHANNEL: (60, 3),
+}
+
+# The tiers of the commonly used methods; see each method's document page
+DEFAULT_METHOD_TIERS: Dict[str, str] = {
+    "admin.analytics.getFile": TIER_2,
+    "apps.connections.open": TIER_1,
+    "auth.test": TIER_4,
+    "bots.info": TIER_3,
+    "chat.delete": TIER_3,
+    "chat.getPermalink": TIER_4,
+    "chat.meMessage": TIER_3,
+    "chat.postEphemeral": TIER_4,
+    "chat.postMessage": TIER_4,
+    "chat.scheduleMessage": TIER_3,
+    "chat.update": TIER_3,
+    "conversations.archive": TIER_2,
+    "conversations.create": TIER_2,
+    "conversations.history": TIER_3,
+    "conversations.info": TIER_3,
+    "conversations.invite": TIER_3,
+    "conversations.join": TIER_3,
+    "conversations.list": TIER_2,
+    "conversations.members": TIER_4,
+    "conversations.open": TIER_3,
+    "conversations.replies": TIER_3,
+    "emoji.list": TIER_2,
+    "files.delete": TIER_3,
+    "files.info": TIER_4,
+    "files.list": TIER_3,
+    "files.upload": TIER_2,
+    "reactions.add": TIER_3,
+    "reactions.get": TIER_3,
+    "reactions.remove": TIER_2,
+    "rtm.connect": TIER_1,
+    "team.info": TIER_3,
+    "users.conversations": TIER_3,
+    "users.getPresence": TIER_3,
+    "users.info": TIER_4,
+    "users.list": TIER_2,
+    "users.lookupByEmail": TIER_3,
+    "users.profile.get": TIER_4,
+    "views.open": TIER_4,
+    "views.publish": TIER_4,
+    "views.push": TIER_4,
+    "views.update": TIER_4,
+}
+
+# Methods that are also limited per channel on top of their tier
+DEFAULT_PER_CHANNEL_METHODS = (
+    "chat.meMessage",
+    "chat.postEphemeral",
+    "chat.postMessage",
+    "chat.scheduleMessage",
+    "chat.update",
+)
+
+# Methods sent without waiting for a token (only a 429's pause applies), as they open the
+# Socket Mode / RTM connections: Tier 1's one per minute would hold up every reconnect
+DEFAULT_UNLIMITED_METHODS = (
+    "apps.connections.open",
+    "rtm.connect",
+    "rtm.start",
+)
+
+
+class TokenBucket:
+    """Token bucket that refills `rate` tokens per second up to `capacity`."""
+
+    rate: float
+    capacity: float
+    tokens: float
+    updated_at: float
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        # a bucket created after `now` was taken is not refilled backwards
+        elapsed = max(0.0, now - self.updated_at)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self.updated_at = max(self.updated_at, now)
+
+    def wait_time(self, now: float) -> float:
+        """Returns the seconds to wait until a token is available."""
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+class RateLimiter:
+    """Thread-safe token bucket scheduler for Web API calls.
+
+    Every method has its own bucket, with the rate and burst size of its tier (Slack
+    limits each method separately), methods listed in `per_channel_methods`
+    also get a bucket per channel, and those in `unlimited_methods` none.
+    When any request receives HTTP 429,
+    `pause` makes all callers wait for the Retry-After duration.
+    """
+
+    logger: Logger
+
+    def __init__(
+        self,
+        *,
+        tier_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        method_tiers: Optional[Dict[str, str]] = None,
+        per_channel_methods: Optional[Tuple[str, ...]] = None,
+        unlimited_methods: Optional[Tuple[str, ...]] = None,
+        default_tier: str = TIER_3,
+        logger: Optional[Logger] = None,
+    ):
+        """Client-side rate limiter
+
+        Args:
+            tier_limits: tier name -> (requests per minute, burst size)
+            method_tiers: API method name -> tier name
+            per_channel_methods: API method names that are limited per channel as well
+            unlimited_methods: API method names that are only held back while paused by a 429
+            default_tier: the tier for methods missing in method_tiers (default: tier3)
+            logger: Custom logger
+        """
+        self.tier_limits = dict(DEFAULT_TIER_LIMITS)
+        if tier_limits:
+            self.tier_limits.update(tier_limits)
+        self.method_tiers = dict(DEFAULT_METHOD_TIERS)
+        if method_tiers:
+            self.method_tiers.update(method_tiers)
+        self.per_channel_methods = set(
+            per_channel_methods
+            if per_channel_methods is not None
+            else DEFAULT_PER_CHANNEL_METHODS
+        )
+        self.unlimited_methods = set(
+            unlimited_methods
+            if unlimited_methods is not None
+            else DEFAULT_UNLIMITED_METHODS
+        )
+        self.default_tier = default_tier
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = Lock()
+        self._method_buckets: Dict[str, TokenBucket] = {}
+        self._channel_buckets: Dict[str, TokenBucket] = {}
+        self._paused_until = 0.0
+        # statistics
+        self.waited_count = 0
+        self.waited_seconds = 0.0
+        self.rate_limited_count = 0
+
+    def acquire(self, api_method: str, channel: Optional[str] = None) -> float:
+        """Blocks until the request is allowed to be sent.
+
+        Args:
+            api_method: The Slack API method. e.g. 'chat.postMessage'
+            channel: The target channel ID for chat methods
+
+        Returns:
+            The seconds spent waiting
+        """
+        total_wait = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                buckets = []
+                if api_method not in self.unlimited_methods:
+                    buckets.append(self._method_bucket(api_method))
+                if channel and api_method in self.per_channel_methods:
+                    buckets.append(self._channel_bucket(channel))
+                wait = max(
+                    [self._paused_until - now] + [b.wait_time(now) for b in buckets]
+                )
+                if wait <= 0:
+                    for b in buckets:
+                        b.take(now)
+                    if total_wait > 0:
+                        self.waited_count += 1
+                        self.waited_seconds += total_wait
+                    return total_wait
+            if self.logger.level <= logging.DEBUG:
+                self.logger.debug(
+                    f"Waiting {wait:.3f} seconds for the rate limit (method: {api_method}, channel: {channel})"
+                )
+            time.sleep(wait)
+            total_wait += wait
+
+    def pause(self, seconds: float) -> None:
+        """Makes all callers wait for the given seconds (e.g., Retry-After of a 429 response)."""
+        with self._lock:
+            self.rate_limited_count += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.logger.info(f"Rate limited by Slack. Pausing all requests for {seconds} seconds")
+
+    def _method_bucket(self, api_method: str) -> TokenBucket:
+        # the methods in the same tier have the same limits, but do not share them
+        bucket = self._method_buckets.get(api_method)
+        if bucket is None:
+            tier = self.method_tiers.get(api_method, self.default_tier)
+            per_minute, burst = self.tier_limits[tier]
+            bucket = self._method_buckets[api_method] = TokenBucket(
+                per_minute / 60.0, burst
+            )
+        return bucket
+
+    def _channel_bucket(self, channel: str) -> TokenBucket:
+        # chat.postMessage and chat.update in the same channel share the channel's limit
+        bucket = self._channel_buckets.get(channel)
+        if bucket is None:
+            per_minute, burst = self.tier_limits[SPECIAL_PER_CHANNEL]
+            bucket = self._channel_buckets[channel] = TokenBucket(
+                per_minute / 60.0, burst
+            )
+        return bucket
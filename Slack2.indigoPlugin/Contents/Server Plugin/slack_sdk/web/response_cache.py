@@ -0,0 +1,314 @@
+"""Client-side caching of read-only Web API responses.
+
+Methods like users.info or conversations.info tend to be called over and over with
+the same arguments. With a ResponseCache, WebClient answers those calls from memory
+for a while, without a request (nor waiting for the rate limiter):
+
+  from slack_sdk import WebClient
+  from slack_sdk.web.response_cache import ResponseCache
+
+  client = WebClient(token=token, response_cache=ResponseCache())
+
+Only the methods listed in `method_ttls` are cached. Events telling that something
+changed (user_change, channel_rename, emoji_changed, ...) can be given to
+`invalidate_for_event` so that the next call fetches it again.
+"""
+import logging
+import time
+from collections import OrderedDict
+from logging import Logger
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from slack_sdk import json_codec
+from .slack_response import SlackResponse
+
+# API method -> seconds to keep its responses
+DEFAULT_METHOD_TTLS: Dict[str, float] = {
+    "bots.info": 3600,
+    "conversations.info": 300,
+    "emoji.list": 3600,
+    "team.info": 3600,
+    "users.info": 600,
+    "users.profile.get": 600,
+}
+
+# event type -> (API method, the argument naming the changed object) pairs to invalidate
+# When the event has a value under that argument name (or a dict with its "id"), only the
+# responses for that object are dropped, otherwise all the responses of the method.
+DEFAULT_EVENT_INVALIDATIONS: Dict[str, Tuple[Tuple[str, Optional[str]], ...]] = {
+    "bot_added": (("bots.info", "bot"),),
+    "bot_changed": (("bots.info", "bot"),),
+    "channel_archive": (("conversations.info", "channel"),),
+    "channel_deleted": (("conversations.info", "channel"),),
+    "channel_rename": (("conversations.info", "channel"),),
+    "channel_unarchive": (("conversations.info", "channel"),),
+    "emoji_changed": (("emoji.list", None),),
+    "group_archive": (("conversations.info", "channel"),),
+    "group_deleted": (("conversations.info", "channel"),),
+    "group_rename": (("conversations.info", "channel"),),
+    "group_unarchive": (("conversations.info", "channel"),),
+    "member_joined_channel": (("conversations.info", "channel"),),
+    "member_left_channel": (("conversations.info", "channel"),),
+    "team_domain_change": (("team.info", None),),
+    "team_join": (("users.info", "user"), ("users.profile.get", "user")),
+    "team_rename": (("team.info", None),),
+    "user_change": (("users.info", "user"), ("users.profile.get", "user")),
+    "user_profile_changed": (("users.info", "user"), ("users.profile.get", "user")),
+}
+
+
+class CachedResponse:
+    """The body of a successful response, kept as the raw JSON bytes."""
+
+    api_method: str
+    args: Dict[str, Any]
+    api_url: str
+    req_args: dict
+    body: bytes
+    headers: dict
+    status_code: int
+    expires_at: float
+
+    def __init__(
+        self,
+        *,
+        api_method: str,
+        args: Dict[str, Any],
+        response: SlackResponse,
+        body: bytes,
+        expires_at: float,
+    ):
+        self.api_method = api_method
+        self.args = args
+        self.api_url = response.api_url
+        self.req_args = response.req_args
+        self.body = body
+        self.headers = response.headers
+        self.status_code = response.status_code
+        self.expires_at = expires_at
+
+    def to_response(self, client) -> SlackResponse:
+        # a new response for every hit, so that callers never modify the cached data
+        req_args = dict(self.req_args)
+        req_args["params"] = dict(req_args.get("params") or {})
+        return SlackResponse(
+            client=client,
+            http_verb="POST",
+            api_url=self.api_url,
+            req_args=req_args,
+            headers=dict(self.headers),
+            status_code=self.status_code,
+            body=self.body,
+        )
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of Web API responses, bounded by the size of their bodies.
+
+    Responses are cached per API method and arguments for the method's TTL. Beyond
+    `max_bytes`, the least recently used ones are evicted.
+    """
+
+    logger: Logger
+    method_ttls: Dict[str, float]
+    max_bytes: int
+
+    def __init__(
+        self,
+        *,
+        method_ttls: Optional[Dict[str, Optional[float]]] = None,
+        max_bytes: int = 4 * 1024 * 1024,
+        event_invalidations: Optional[
+            Dict[str, Tuple[Tuple[str, Optional[str]], ...]]
+        ] = None,
+        logger: Optional[Logger] = None,
+    ):
+        """Client-side response cache
+
+        Args:
+            method_ttls: API method name -> seconds to cache its responses, added to the defaults
+                (None or 0 to not cache a method cached by default)
+            max_bytes: The memory budget, as the total size of the cached response bodies (default: 4 MB)
+            event_invalidations: event type -> (API method, argument name) pairs, added to the defaults
+            logger: Custom logger
+        """
+        self.method_ttls = dict(DEFAULT_METHOD_TTLS)
+        if method_ttls:
+            self.method_ttls.update(method_ttls)
+        self.method_ttls = {
+            method: ttl for method, ttl in self.method_ttls.items() if ttl
+        }
+        self.event_invalidations = dict(DEFAULT_EVENT_INVALIDATIONS)
+        if event_invalidations:
+            self.event_invalidations.update(event_invalidations)
+        self.max_bytes = max_bytes
+        self.logger = logger or logging.getLogger(__name__)
+
+        self._lock = Lock()
+        # (API method, arguments) -> response, least recently used first
+        self._entries: "OrderedDict[Tuple[str, Tuple], CachedResponse]" = OrderedDict()
+        # API method -> (requests sent, seconds spent), to estimate the time saved by a hit
+        self._latencies: Dict[str, Tuple[int, float]] = {}
+        # statistics
+        self.size = 0
+        self.hit_count = 0
+        self.miss_count = 0
+        self.saved_seconds = 0.0
+        self.eviction_count = 0
+        self.expiration_count = 0
+        self.invalidation_count = 0
+
+    def is_cacheable(self, api_method: str) -> bool:
+        return api_method in self.method_ttls
+
+    def get(
+        self, client, api_method: str, args: Dict[str, Any]
+    ) -> Optional[SlackResponse]:
+        """Returns the cached response for the API call, or None.
+
+        Args:
+            client: The WebClient to attach to the response (used for pagination)
+            api_method: The Slack API method. e.g. 'users.info'
+            args: The arguments of the call
+
+        Returns:
+            A new SlackResponse with the cached data, or None when it is missing or expired
+        """
+        key = (api_method, self._args_key(args))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self.expiration_count += 1
+                entry = None
+            if entry is None:
+                self.miss_count += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hit_count += 1
+            sent, seconds = self._latencies.get(api_method, (0, 0.0))
+            if sent:
+                self.saved_seconds += seconds / sent
+        if self.logger.level <= logging.DEBUG:
+            self.logger.debug(f"Answered {api_method} from the response cache (args: {args})")
+        return entry.to_response(client)
+
+    def put(
+        self,
+        api_method: str,
+        args: Dict[str, Any],
+        response: SlackResponse,
+        elapsed: float,
+    ) -> None:
+        """Caches a successful response.
+
+        Args:
+            api_method: The Slack API method. e.g. 'users.info'
+            args: The arguments of the call
+            response: The validated response
+            elapsed: The seconds the API call took
+        """
+        ttl = self.method_ttls.get(api_method)
+        if not ttl:
+            return
+        body = response._body  # skipcq: PYL-W0212
+        if body is None:
+            if not isinstance(response.data, dict):
+                # binary data
+                return
+            body = json_codec.dumps(response.data)
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+
+        key = (api_method, self._args_key(args))
+        with self._lock:
+            sent, seconds = self._latencies.get(api_method, (0, 0.0))
+            self._latencies[api_method] = (sent + 1, seconds + elapsed)
+            if len(body) > self.max_bytes:
+                return
+            self._remove(key)
+            self._entries[key] = CachedResponse(
+                api_method=api_method,
+                args=dict(args),
+                response=response,
+                body=body,
+                expires_at=time.monotonic() + ttl,
+            )
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.eviction_count += 1
+
+    def invalidate(self, api_method: Optional[str] = None, **args) -> int:
+        """Drops cached responses.
+
+        e.g. cache.invalidate("users.info", user="U111") drops users.info responses for U111,
+        cache.invalidate("emoji.list") all the emoji.list responses, cache.invalidate() everything.
+
+        Args:
+            api_method: The Slack API method, or None for all of them
+            args: Only drop the responses of calls with these argument values
+
+        Returns:
+            The number of dropped responses
+        """
+        with self._lock:
+            keys = [
+                key
+                for key, entry in self._entries.items()
+                if (api_method is None or entry.api_method == api_method)
+                and all(entry.args.get(k) == v for k, v in args.items())
+            ]
+            for key in keys:
+                self._remove(key)
+            self.invalidation_count += len(keys)
+        if keys and self.logger.level <= logging.DEBUG:
+            self.logger.debug(
+                f"Dropped {len(keys)} cached responses (method: {api_method}, args: {args})"
+            )
+        return len(keys)
+
+    def invalidate_for_event(self, event: dict) -> int:
+        """Drops the cached responses made stale by an Events API / RTM event.
+
+        Args:
+            event: The event, e.g. {"type": "user_change", "user": {"id": "U111", ...}}
+
+        Returns:
+            The number of dropped responses
+        """
+        dropped = 0
+        for api_method, arg in self.event_invalidations.get(event.get("type"), ()):
+            value = event.get(arg) if arg else None
+            if isinstance(value, dict):
+                value = value.get("id")
+            if value is not None:
+                dropped += self.invalidate(api_method, **{arg: value})
+            else:
+                dropped += self.invalidate(api_method)
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hit_count + self.miss_count
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "hits": self.hit_count,
+            "misses": self.miss_count,
+            "hit_ratio": self.hit_count / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "evictions": self.eviction_count,
+            "expirations": self.expiration_count,
+            "invalidations": self.invalidation_count,
+        }
+
+    @staticmethod
+    def _args_key(args: Dict[str, Any]) -> Tuple:
+        # values can be lists or dicts; their str() is enough to tell the calls apart
+        return tuple(sorted((k, str(v)) for k, v in args.items() if v is not None))
+
+    def _remove(self, key: Tuple[str, Tuple]) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry.body)
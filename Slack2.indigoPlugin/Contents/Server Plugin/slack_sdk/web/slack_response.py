@@ -1,10 +1,21 @@
 """A Python module for interacting and consuming responses from Slack."""
 
 import logging
-from typing import Union
+import re
+from queue import Full, Queue
+from threading import Event, Thread
+from typing import Any, Iterator, Mapping, Optional, Union
 
 import slack_sdk.errors as e
-from .internal_utils import _next_cursor_is_present
+from slack_sdk import json_codec
+from .internal_utils import (
+    _build_unexpected_body_error_message,
+    _decode_response_body,
+    _next_cursor_is_present,
+)
+
+# Slack puts "ok" first in the top-level object, e.g. {"ok":true,"channel":"C111",...}
+_LEADING_OK_PATTERN = re.compile(rb'\s*\{\s*"ok"\s*:\s*(true|false)\b')
 
 
 class SlackResponse:
@@ -13,12 +24,16 @@ class SlackResponse:
     Attributes:
         data (dict): The json-encoded content of the response. Along
             with the headers and status code information.
+            When the response was created with the raw body, it is
+            parsed on first access.
 
     Methods:
         validate: Check if the response from Slack was successful.
         get: Retrieves any key from the response data.
         next: Retrieves the next portion of results,
             if 'next_cursor' is present.
+        iter_items: Iterates over the items of all the portions,
+            fetching the next ones in the background.
 
     Example:
     ```python
@@ -36,6 +51,8 @@ class SlackResponse:
     users = []
     for page in client.users_list(limit=2):
         users = users + page['members']
+
+    users = list(client.users_list(limit=200).iter_items("members"))
     ```
 
     Note:
@@ -58,21 +75,81 @@ class SlackResponse:
         http_verb: str,
         api_url: str,
         req_args: dict,
-        data: Union[dict, bytes],  # data can be binary data
-        headers: dict,
+        data: Union[dict, bytes, None] = None,  # data can be binary data
+        headers: Union[dict, Mapping[str, str]],
         status_code: int,
+        body: Optional[Union[str, bytes]] = None,
     ):
+        """
+        Args:
+            data: The parsed response body (or the binary data)
+            headers: The response headers, either a dict or the HTTPMessage as received
+            body: The raw JSON body, to be parsed only when the data is first accessed
+                (given instead of data)
+        """
         self.http_verb = http_verb
         self.api_url = api_url
         self.req_args = req_args
-        self.data = data
+        self._body = body
+        self._data = data
+        self._initial = data
         self.headers = headers
         self.status_code = status_code
-        self._initial_data = data
         self._iteration = None  # for __iter__ & __next__
         self._client = client
         self._logger = logging.getLogger(__name__)
 
+    @property
+    def data(self) -> Union[dict, bytes, None]:
+        if self._body is not None:
+            self._parse_body()
+        return self._data
+
+    @data.setter
+    def data(self, data: Union[dict, bytes, None]) -> None:
+        if self._body is not None:
+            self._parse_body()
+        self._data = data
+
+    @property
+    def headers(self) -> dict:
+        if not isinstance(self._headers, dict):
+            self._headers = dict(self._headers)
+        return self._headers
+
+    @headers.setter
+    def headers(self, headers: Union[dict, Mapping[str, str]]) -> None:
+        self._headers = headers
+
+    @property
+    def _initial_data(self) -> Union[dict, bytes, None]:
+        if self._body is not None:
+            self._parse_body()
+        return self._initial
+
+    def _parse_body(self) -> None:
+        body, self._body = self._body, None
+        try:
+            self._data = self._initial = json_codec.loads(body)
+        except ValueError:
+            response = {"status": self.status_code, "headers": self._headers, "body": body}
+            message = _build_unexpected_body_error_message(
+                _decode_response_body(response)
+            )
+            raise e.SlackApiError(message, response)
+
+    def _peek_ok(self) -> Optional[bool]:
+        """Returns the top-level "ok" flag without parsing the whole body, if it can tell."""
+        if self._body is None:
+            return None
+        if isinstance(self._body, str):
+            # only for charsets other than UTF-8
+            return None
+        matched = _LEADING_OK_PATTERN.match(self._body)
+        if matched is None:
+            return None
+        return matched.group(1) == b"true"
+
     def __str__(self):
         """Return the Response data if object is converted to a string."""
         if isinstance(self.data, bytes):
@@ -95,6 +172,10 @@ class SlackResponse:
         Returns:
             The value from data or None.
         """
+        if key == "ok":
+            ok = self._peek_ok()
+            if ok is not None:
+                return ok
         if isinstance(self.data, bytes):
             raise ValueError(
                 "As the response.data is binary data, this operation is unsupported"
@@ -166,6 +247,96 @@ class SlackResponse:
         else:
             raise StopIteration
 
+    def iter_items(
+        self,
+        key: str,
+        *,
+        page_size: Optional[int] = None,
+        prefetch: int = 1,
+    ) -> Iterator[Any]:
+        """Iterates over the items of all the portions of results, e.g. "members" of users.list.
+
+        Note:
+            Unlike iterating over the response itself, the next portions are
+            fetched on a background thread, up to `prefetch` ahead of the one
+            being consumed, so that the requests overlap with the processing
+            of the items. This object itself is not modified.
+
+        Args:
+            key: The name of the list in each portion, e.g. "members", "channels" or "messages"
+            page_size: The limit to request the following portions with (default: as in the first request)
+            prefetch: The number of portions to fetch ahead (default: 1)
+
+        Returns:
+            An iterator of the items
+
+        Raises:
+            SlackApiError: If the request for a portion failed.
+        """
+        if isinstance(self._initial_data, bytes):
+            raise ValueError(
+                "As the response.data is binary data, this operation is unsupported"
+            )
+        req_args = dict(self.req_args)
+        params = dict(req_args.get("params") or {})
+        if page_size is not None:
+            params["limit"] = page_size
+        pages: Queue = Queue(maxsize=max(1, prefetch))
+        stopped = Event()
+
+        def _put(page) -> bool:
+            while not stopped.is_set():
+                try:
+                    pages.put(page, timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        def _fetch_pages():
+            data = self._initial_data
+            while _next_cursor_is_present(data):
+                params["cursor"] = data.get("response_metadata", {}).get(
+                    "next_cursor"
+                ) or data.get("next_cursor")
+                page_args = dict(req_args, params=dict(params))
+                try:
+                    # skipcq: PYL-W0212
+                    response = self._client._request_for_pagination(
+                        api_url=self.api_url, req_args=page_args
+                    )
+                    data = SlackResponse(
+                        client=self._client,
+                        http_verb=self.http_verb,
+                        api_url=self.api_url,
+                        req_args=page_args,
+                        data=response["data"],
+                        headers=response["headers"],
+                        status_code=response["status_code"],
+                    ).validate().data
+                except Exception as err:
+                    _put(err)
+                    return
+                if not _put(data):
+                    return
+            _put(None)
+
+        fetcher = None
+        if _next_cursor_is_present(self._initial_data):
+            fetcher = Thread(target=_fetch_pages, name="Slack pagination", daemon=True)
+            fetcher.start()
+        try:
+            yield from self._initial_data.get(key) or []
+            while fetcher is not None:
+                page = pages.get()
+                if page is None:
+                    return
+                if isinstance(page, Exception):
+                    raise page
+                yield from page.get(key) or []
+        finally:
+            stopped.set()
+
     def get(self, key, default=None):
         """Retrieves any key from the response data.
 
@@ -177,6 +348,10 @@ class SlackResponse:
         Returns:
             The value from data or the specified default.
         """
+        if key == "ok":
+            ok = self._peek_ok()
+            if ok is not None:
+                return ok
         if isinstance(self.data, bytes):
             raise ValueError(
                 "As the response.data is binary data, this operation is unsupported"
@@ -195,6 +370,9 @@ class SlackResponse:
         Raises:
             SlackApiError: The request to the Slack API failed.
         """
+        if self.status_code == 200 and self._peek_ok():
+            # the body is parsed later on, if ever accessed
+            return self
         if (
             self.status_code == 200
             and self.data
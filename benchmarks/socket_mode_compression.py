@@ -0,0 +1,158 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Bandwidth and CPU cost of permessage-deflate on the builtin Socket Mode connection.
+
+A local stand-in WebSocket server sends Socket Mode style envelopes to a
+slack_sdk.socket_mode.builtin.connection.Connection, with and without
+compression, and the bytes on the wire and the client's receive CPU time are
+compared. Each run also sends an ack back to check the client's compression.
+
+    python benchmarks/socket_mode_compression.py [number of envelopes]
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Slack2.indigoPlugin", "Contents", "Server Plugin"))
+
+from slack_sdk.socket_mode.builtin.connection import Connection, ConnectionState  # noqa: E402
+
+
+def envelope(i):
+    return json.dumps({
+        "envelope_id": f"{i:08x}-0b4f-4a6e-9d1e-3f0c5c1c6d7e",
+        "payload": {
+            "token": "XXYYZZ", "team_id": "T0123ABCD", "api_app_id": "A0123ABCD", "type": "event_callback",
+            "event": {"type": "message", "channel": "C0123ABCD", "user": "U0123ABCD", "text": f"Motion detected in zone {i % 7}",
+                      "ts": f"{1700000000 + i}.000100", "event_ts": f"{1700000000 + i}.000100", "channel_type": "channel"},
+            "event_id": f"Ev{i:010d}", "event_time": 1700000000 + i,
+            "authorizations": [{"enterprise_id": None, "team_id": "T0123ABCD", "user_id": "U0123ABCD", "is_bot": True}],
+        },
+        "type": "events_api", "accepts_response_payload": False, "retry_attempt": 0, "retry_reason": "",
+    }).encode("utf-8")
+
+
+def frame(payload, rsv1=0):
+    b1 = 0x80 | rsv1 << 6 | 0x1
+    length = len(payload)
+    if length <= 125:
+        return bytes([b1, length]) + payload
+    if length <= 0xFFFF:
+        return struct.pack("!BBH", b1, 126, length) + payload
+    return struct.pack("!BBQ", b1, 127, length) + payload
+
+
+def serve(server, count, result):
+    sock, _ = server.accept()
+    request = b""
+    while b"\r\n\r\n" not in request:
+        request += sock.recv(4096)
+    headers = dict(line.split(": ", 1) for line in request.decode().split("\r\n")[1:] if ": " in line)
+    accept = base64.b64encode(hashlib.sha1((headers["Sec-WebSocket-Key"] + "258EAFA5-E914-47DA-95CA-C5AB0DC85B11").encode()).digest())
+    deflate = "permessage-deflate" in headers.get("Sec-WebSocket-Extensions", "")
+    response = b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\nSec-WebSocket-Accept: " + accept
+    if deflate:
+        response += b"\r\nSec-WebSocket-Extensions: permessage-deflate"
+    sock.sendall(response + b"\r\n\r\n")
+
+    compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    payload_bytes = wire_bytes = 0
+    for i in range(count):
+        payload = envelope(i)
+        payload_bytes += len(payload)
+        if deflate:
+            data = frame((compressor.compress(payload) + compressor.flush(zlib.Z_SYNC_FLUSH))[:-4], rsv1=1)
+        else:
+            data = frame(payload)
+        wire_bytes += len(data)
+        sock.sendall(data)
+    result.update(payload_bytes=payload_bytes, wire_bytes=wire_bytes)
+
+    # read the client's frames until its ack arrives
+    received = b""
+    decompressor = zlib.decompressobj(-15)
+    while "ack" not in result:
+        received += sock.recv(65536)
+        while len(received) >= 6:
+            b1, b2 = received[0], received[1] & 0x7F
+            offset = 2 if b2 < 126 else 4
+            length = b2 if b2 < 126 else struct.unpack("!H", received[2:4])[0]
+            if len(received) < offset + 4 + length:
+                break
+            key, data = received[offset:offset + 4], received[offset + 4:offset + 4 + length]
+            received = received[offset + 4 + length:]
+            data = bytes(b ^ key[i % 4] for i, b in enumerate(data))
+            if b1 & 0x0F == 0x1:
+                result["ack"] = decompressor.decompress(data + b"\x00\x00\xff\xff") if b1 & 0x40 else data
+    sock.close()
+
+
+def run(count, compression_enabled):
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+    result = {}
+    server_thread = threading.Thread(target=serve, args=(server, count, result), daemon=True)
+    server_thread.start()
+
+    received = []
+    done = threading.Event()
+
+    def on_message(message):
+        received.append(message)
+        if len(received) == count:
+            done.set()
+
+    connection = Connection(
+        url=f"ws://127.0.0.1:{server.getsockname()[1]}/link/?ticket=benchmark",
+        logger=logging.getLogger(__name__),
+        receive_buffer_size=65536,
+        compression_enabled=compression_enabled,
+        on_message_listener=on_message,
+    )
+    connection.connect()
+    state = ConnectionState()
+    cpu = {}
+
+    def receive():
+        started = time.thread_time()
+        connection.run_until_completion(state)
+        cpu["receive"] = time.thread_time() - started
+
+    started = time.perf_counter()
+    client_thread = threading.Thread(target=receive, daemon=True)
+    client_thread.start()
+    done.wait(60)
+    elapsed = time.perf_counter() - started
+    ack = b'{"envelope_id": "00000000-0b4f-4a6e-9d1e-3f0c5c1c6d7e"}'
+    connection.send(ack.decode("utf-8"))
+    server_thread.join(10)
+    state.terminated = True
+    client_thread.join(10)
+    connection.disconnect()
+    server.close()
+
+    assert len(received) == count and received[-1] == envelope(count - 1).decode("utf-8")
+    assert result.get("ack") == ack, result.get("ack")
+    return result, elapsed, cpu.get("receive", 0.0), connection.deflate is not None
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    for compression_enabled in (False, True):
+        result, elapsed, cpu, negotiated = run(count, compression_enabled)
+        print(f"permessage-deflate {'on ' if negotiated else 'off'}: {count} envelopes, "
+              f"{result['payload_bytes'] / count:,.0f} bytes/envelope, {result['wire_bytes'] / count:,.0f} bytes/envelope on the wire "
+              f"({result['wire_bytes'] / result['payload_bytes']:.0%}), "
+              f"{count / elapsed:,.0f} envelopes/sec, client receive CPU {cpu * 1e6 / count:.1f} us/envelope")
@@ -0,0 +1,53 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark for the Socket Mode WebSocket frame parser.
+
+Feeds server frames to slack_sdk.socket_mode.builtin.frame_parser.FrameParser in
+receive_buffer_size pieces and reports frames/sec and bytes copied per frame.
+
+    python benchmarks/socket_mode_frame_parser.py
+"""
+
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Slack2.indigoPlugin", "Contents", "Server Plugin"))
+
+from slack_sdk.socket_mode.builtin.frame_parser import FrameParser  # noqa: E402
+
+
+def server_frame(payload):
+    length = len(payload)
+    if length <= 125:
+        header = bytes([0x81, length])
+    elif length <= 0xFFFF:
+        header = struct.pack("!BBH", 0x81, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x81, 127, length)
+    return header + payload
+
+
+def run(name, frame, count, chunk_size):
+    stream = frame * count
+    chunks = [stream[i:i + chunk_size] for i in range(0, len(stream), chunk_size)]
+    parser = FrameParser()
+    received = 0
+    started = time.perf_counter()
+    for chunk in chunks:
+        received += len(parser.feed(chunk))
+    elapsed = time.perf_counter() - started
+    assert received == count, (received, count)
+    print(f"{name:<34} {count / elapsed:>12,.0f} frames/sec "
+          f"{(parser.bytes_copied + len(stream)) / count:>12,.0f} bytes copied/frame "
+          f"({len(frame):,} bytes/frame)")
+
+
+if __name__ == "__main__":
+    chunk_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1024
+    print(f"receive_buffer_size = {chunk_size}")
+    run("small frames (100 bytes)", server_frame(b"x" * 100), 200000, chunk_size)
+    run("envelopes (4 KB)", server_frame(b"x" * 4096), 20000, chunk_size)
+    run("large payload (1 MB)", server_frame(b"x" * (1 << 20)), 20, chunk_size)
@@ -0,0 +1,114 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Micro-benchmark for building Web API responses, parsed right away or on first access.
+
+The HTTP round trip is replaced with a recorded response (body bytes and HTTPMessage
+headers), so only the client side work is measured: parsing the body, copying the
+params and headers and building the SlackResponse. Each call checks only "ok", as a
+fire-and-forget chat.postMessage does; the last column reads one more key, which
+parses the body in lazy mode too. Reports calls/sec and the bytes allocated per call.
+
+    python benchmarks/web_lazy_response.py [calls]
+"""
+
+import email
+import json
+import os
+import sys
+import time
+import tracemalloc
+from http.client import HTTPMessage
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Slack2.indigoPlugin", "Contents", "Server Plugin"))
+
+from slack_sdk import json_codec  # noqa: E402
+from slack_sdk.web import WebClient  # noqa: E402
+
+HEADERS = (
+    "Content-Type: application/json; charset=utf-8\r\n"
+    "X-Slack-Req-Id: 0123456789abcdef0123456789abcdef\r\n"
+    "X-OAuth-Scopes: chat:write,channels:read,groups:read,im:read,users:read\r\n"
+    "X-Accepted-OAuth-Scopes: chat:write\r\n"
+    "Access-Control-Expose-Headers: x-slack-req-id, retry-after\r\n"
+    "Cache-Control: private, no-cache, no-store, must-revalidate\r\n"
+    "Vary: Accept-Encoding\r\n"
+    "Strict-Transport-Security: max-age=31536000; includeSubDomains; preload\r\n"
+    "Content-Encoding: gzip\r\n\r\n"
+)
+
+
+def posted_message(i):
+    text = f"Motion detected in zone {i % 7}, lights turned on in room {i % 12}"
+    return {
+        "ok": True, "channel": "C0123ABCD", "ts": f"{1700000000 + i}.000100",
+        "message": {
+            "bot_id": "B0123ABCD", "type": "message", "text": text, "user": "U0123ABCD", "ts": f"{1700000000 + i}.000100",
+            "app_id": "A0123ABCD", "team": "T0123ABCD",
+            "bot_profile": {"id": "B0123ABCD", "deleted": False, "name": "Indigo", "updated": 1700000000,
+                            "app_id": "A0123ABCD", "icons": {"image_36": "https://a.slack-edge.com/80588/img/plugins/app/bot_36.png",
+                                                             "image_48": "https://a.slack-edge.com/80588/img/plugins/app/bot_48.png",
+                                                             "image_72": "https://a.slack-edge.com/80588/img/plugins/app/service_72.png"},
+                            "team_id": "T0123ABCD"},
+            "blocks": [{"type": "rich_text", "block_id": f"b{i:05d}", "elements": [
+                {"type": "rich_text_section", "elements": [{"type": "text", "text": text}]}]}],
+        },
+    }
+
+
+RESPONSES = {
+    "chat.postMessage": json.dumps(posted_message(1)).encode("utf-8"),
+    "conversations.history": json.dumps(
+        {"ok": True, "messages": [posted_message(i)["message"] for i in range(200)], "has_more": False}
+    ).encode("utf-8"),
+}
+
+
+class RecordedWebClient(WebClient):
+    body = b""
+    headers = email.message_from_string(HEADERS, _class=HTTPMessage)
+
+    def _perform_urllib_http_request(self, *, url, args):
+        return {"status": 200, "headers": self.headers, "body": self.body}
+
+
+def run(method, lazy, calls, read_more):
+    client = RecordedWebClient(token="xoxb-benchmark", lazy_response=lazy)
+    client.body = RESPONSES[method]
+
+    def call():
+        response = client.api_call(method, params={"channel": "C0123ABCD", "text": "hello", "unfurl_links": False})
+        assert response["ok"]
+        if read_more:
+            assert response["channel" if method == "chat.postMessage" else "has_more"] is not None
+
+    for _ in range(100):
+        call()
+    started = time.perf_counter()
+    for _ in range(calls):
+        call()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    call()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return calls / elapsed, peak - before
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print(f"JSON codec: {json_codec.get_json_codec().name}")
+    print(f"{'method':<24}{'body bytes':>12}{'mode':>7}{'calls/sec':>12}{'peak bytes/call':>17}{'calls/sec (read)':>18}")
+    for method, body in RESPONSES.items():
+        for lazy in (False, True):
+            rate, allocated = run(method, lazy, calls, read_more=False)
+            read_rate, _ = run(method, lazy, calls, read_more=True)
+            print(f"{method:<24}{len(body):>12,}{'lazy' if lazy else 'eager':>7}{rate:>12,.0f}{allocated:>17,}{read_rate:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
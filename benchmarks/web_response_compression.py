@@ -0,0 +1,177 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Bytes transferred and time spent on large Web API responses, with and without gzip / deflate.
+
+A local stand-in Web API server answers users.list, conversations.list and
+conversations.history with large recorded-style responses, compressed when the
+request accepts it. The link is throttled to a given bandwidth so the transfer
+time is included. WebClient and LegacyWebClient call each method once with
+compression, and once with "Accept-Encoding: identity"; the bytes on the wire,
+the total call time and the client side decompress + parse time are compared.
+
+    python benchmarks/web_response_compression.py [link speed in Mbit/s]
+"""
+
+import gzip
+import json
+import os
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Slack2.indigoPlugin", "Contents", "Server Plugin"))
+
+from slack_sdk.web import WebClient  # noqa: E402
+from slack_sdk.web.internal_utils import _read_response_body  # noqa: E402
+
+try:
+    from slack_sdk.web.legacy_client import LegacyWebClient  # noqa: E402
+except ImportError:
+    # needs aiohttp
+    LegacyWebClient = None
+
+
+def member(i):
+    return {
+        "id": f"U{i:08X}", "team_id": "T0123ABCD", "name": f"user{i}", "deleted": False, "color": "9f69e7",
+        "real_name": f"User Number {i}", "tz": "America/New_York", "tz_label": "Eastern Daylight Time", "tz_offset": -14400,
+        "profile": {
+            "title": "", "phone": "", "skype": "", "real_name": f"User Number {i}", "real_name_normalized": f"User Number {i}",
+            "display_name": f"user{i}", "display_name_normalized": f"user{i}", "fields": None, "status_text": "",
+            "status_emoji": "", "status_expiration": 0, "avatar_hash": f"g{i:011x}", "first_name": "User", "last_name": f"Number {i}",
+            "image_24": f"https://secure.gravatar.com/avatar/{i:032x}.jpg?s=24&d=https%3A%2F%2Fa.slack-edge.com%2Fdf10d%2Fimg%2Favatars%2Fava_0010-24.png",
+            "image_72": f"https://secure.gravatar.com/avatar/{i:032x}.jpg?s=72&d=https%3A%2F%2Fa.slack-edge.com%2Fdf10d%2Fimg%2Favatars%2Fava_0010-72.png",
+            "image_192": f"https://secure.gravatar.com/avatar/{i:032x}.jpg?s=192&d=https%3A%2F%2Fa.slack-edge.com%2Fdf10d%2Fimg%2Favatars%2Fava_0010-192.png",
+            "team": "T0123ABCD",
+        },
+        "is_admin": False, "is_owner": False, "is_primary_owner": False, "is_restricted": False, "is_ultra_restricted": False,
+        "is_bot": False, "is_app_user": False, "updated": 1700000000 + i, "is_email_confirmed": True, "who_can_share_contact_card": "EVERYONE",
+    }
+
+
+def channel(i):
+    return {
+        "id": f"C{i:08X}", "name": f"channel-{i}", "is_channel": True, "is_group": False, "is_im": False, "is_mpim": False,
+        "is_private": False, "created": 1600000000 + i, "is_archived": False, "is_general": i == 0, "unlinked": 0,
+        "name_normalized": f"channel-{i}", "is_shared": False, "is_org_shared": False, "is_pending_ext_shared": False,
+        "pending_shared": [], "context_team_id": "T0123ABCD", "updated": 1700000000 + i, "creator": f"U{i % 50:08X}",
+        "is_ext_shared": False, "shared_team_ids": ["T0123ABCD"], "is_member": i % 3 == 0,
+        "topic": {"value": f"Topic of channel {i}", "creator": f"U{i % 50:08X}", "last_set": 1650000000 + i},
+        "purpose": {"value": f"Purpose of channel {i}", "creator": f"U{i % 50:08X}", "last_set": 1650000000 + i},
+        "previous_names": [], "num_members": 10 + i % 90,
+    }
+
+
+def message(i):
+    return {
+        "type": "message", "user": f"U{i % 50:08X}", "text": f"Motion detected in zone {i % 7}, lights turned on in room {i % 12}",
+        "ts": f"{1700000000 + i}.000{i % 1000:03d}", "team": "T0123ABCD", "client_msg_id": f"{i:08x}-4b2c-4f1e-9a0d-3c5e7f9a1b2c",
+        "blocks": [{"type": "rich_text", "block_id": f"b{i:05d}", "elements": [{"type": "rich_text_section", "elements": [
+            {"type": "text", "text": f"Motion detected in zone {i % 7}, lights turned on in room {i % 12}"}]}]}],
+    }
+
+
+RESPONSES = {
+    "users.list": {"ok": True, "members": [member(i) for i in range(1000)], "cache_ts": 1700000000,
+                   "response_metadata": {"next_cursor": ""}},
+    "conversations.list": {"ok": True, "channels": [channel(i) for i in range(1000)], "response_metadata": {"next_cursor": ""}},
+    "conversations.history": {"ok": True, "messages": [message(i) for i in range(1000)], "has_more": False,
+                              "pin_count": 0, "response_metadata": {"next_cursor": ""}},
+}
+BODIES = {method: json.dumps(body).encode("utf-8") for method, body in RESPONSES.items()}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    bytes_per_second = 0
+    wire_bytes = 0
+
+    def do_GET(self):
+        self.respond()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.respond()
+
+    def respond(self):
+        body = BODIES[self.path.split("?")[0].split("/")[-1]]
+        accepted = [e.strip() for e in self.headers.get("Accept-Encoding", "").split(",")]
+        encoding = None
+        if "gzip" in accepted:
+            encoding, body = "gzip", gzip.compress(body, compresslevel=6)
+        elif "deflate" in accepted:
+            encoding, body = "deflate", zlib.compress(body, 6)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        Handler.wire_bytes += len(body)
+        # throttle to the link speed
+        for start in range(0, len(body), 16 * 1024):
+            chunk = body[start:start + 16 * 1024]
+            self.wfile.write(chunk)
+            time.sleep(len(chunk) / self.bytes_per_second)
+
+    def log_message(self, *args):
+        pass
+
+
+def decode_time(method, encoding, repeat=20):
+    # what the client does with a received body: decompress while reading, decode and parse
+    body = BODIES[method]
+    if encoding == "gzip":
+        body = gzip.compress(body, compresslevel=6)
+
+    class Response:
+        def __init__(self):
+            self.headers = {"Content-Encoding": encoding} if encoding else {}
+            self.offset = 0
+
+        def read(self, amt=None):
+            end = len(body) if amt is None else self.offset + amt
+            data, self.offset = body[self.offset:end], min(end, len(body))
+            return data
+
+    started = time.perf_counter()
+    for _ in range(repeat):
+        json.loads(_read_response_body(Response()).decode("utf-8"))
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    mbps = float(sys.argv[1]) if len(sys.argv) > 1 else 20.0
+    Handler.bytes_per_second = mbps * 1000 * 1000 / 8
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/"
+
+    print(f"link speed: {mbps:g} Mbit/s")
+    print(f"{'client':<16}{'method':<24}{'encoding':<10}{'JSON bytes':>12}{'wire bytes':>12}{'call ms':>10}{'decode ms':>11}")
+    if LegacyWebClient is None:
+        print("LegacyWebClient skipped, aiohttp is not installed")
+    for client_class in (c for c in (WebClient, LegacyWebClient) if c is not None):
+        for method, call in (
+            ("users.list", lambda client: client.users_list(limit=1000)),
+            ("conversations.list", lambda client: client.conversations_list(limit=1000)),
+            ("conversations.history", lambda client: client.conversations_history(channel="C00000000", limit=1000)),
+        ):
+            for encoding in ("gzip", None):
+                headers = None if encoding else {"Accept-Encoding": "identity"}
+                client = client_class(token="xoxb-benchmark", base_url=base_url, headers=headers)
+                Handler.wire_bytes = 0
+                started = time.perf_counter()
+                response = call(client)
+                elapsed = time.perf_counter() - started
+                assert response["ok"] and response.data == RESPONSES[method]
+                print(f"{client_class.__name__:<16}{method:<24}{encoding or 'identity':<10}{len(BODIES[method]):>12,}"
+                      f"{Handler.wire_bytes:>12,}{elapsed * 1000:>10.1f}{decode_time(method, encoding) * 1000:>11.2f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
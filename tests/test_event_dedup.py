@@ -0,0 +1,54 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+EventDeduplicator, which drops Slack's redeliveries of an event.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+import unittest
+from threading import Barrier, Thread
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Slack2.indigoPlugin", "Contents", "Server Plugin"))
+
+from event_dedup import EventDeduplicator  # noqa: E402
+
+
+class TestEventDeduplicator(unittest.TestCase):
+    def test_redelivery_is_a_duplicate(self):
+        dedup = EventDeduplicator()
+        self.assertFalse(dedup.check_and_mark("T111", "Ev111"))
+        self.assertTrue(dedup.check_and_mark("T111", "Ev111"))
+        self.assertFalse(dedup.check_and_mark("T222", "Ev111"))
+        self.assertEqual(dedup.stats("T111"), (1, 1))
+
+    def test_concurrent_deliveries_pass_once(self):
+        dedup = EventDeduplicator()
+        deliveries = 8
+        barrier = Barrier(deliveries)
+        passed = []
+
+        def deliver():
+            barrier.wait()
+            if not dedup.check_and_mark("T111", "Ev111"):
+                passed.append(True)
+
+        threads = [Thread(target=deliver) for _ in range(deliveries)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(passed), 1)
+
+    def test_forgotten_event_is_not_a_duplicate(self):
+        dedup = EventDeduplicator()
+        self.assertFalse(dedup.check_and_mark("T111", "Ev111"))
+        dedup.forget("T111", "Ev111")
+        self.assertFalse(dedup.check_and_mark("T111", "Ev111"))
+        self.assertEqual(dedup.stats("T111"), (0, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
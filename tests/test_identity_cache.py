@@ -0,0 +1,99 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+IdentityCache, which resolves user ids to display names in the background.
+
+    python -m pytest tests
+"""
+
+import logging
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Slack2.indigoPlugin", "Contents", "Server Plugin"))
+
+from identity_cache import IdentityCache  # noqa: E402
+
+
+class FakeUsersList:
+    def __init__(self, members):
+        self.members = members
+
+    def iter_items(self, key, prefetch=1):
+        return iter(self.members)
+
+
+class FakeClient:
+    def __init__(self):
+        self.members = []
+        self.list_calls = 0
+        self.info_calls = []
+
+    def users_list(self, limit):
+        self.list_calls += 1
+        # the users joined after the cache was warmed
+        return FakeUsersList(list(self.members) if self.list_calls > 1 else [])
+
+    def users_info(self, user):
+        self.info_calls.append(user)
+        return {"user": {"id": user, "name": f"info-{user}"}}
+
+
+def user(user_id):
+    return {"id": user_id, "name": f"list-{user_id}"}
+
+
+class TestIdentityCache(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient()
+        self.cache = IdentityCache("Test", self.client, logging.getLogger("test_identity_cache"))
+
+    def tearDown(self):
+        self.cache.stop()
+
+    def wait_for(self, user_ids):
+        deadline = time.time() + 5
+        while time.time() < deadline:
+            names = [self.cache.display_name(user_id) for user_id in user_ids]
+            if all(names):
+                return names
+            time.sleep(0.01)
+        self.fail(f"{user_ids} were not looked up")
+
+    def test_few_misses_are_looked_up_with_users_info(self):
+        self.cache.start()
+        self.assertIsNone(self.cache.display_name("U1"))
+        self.assertEqual(self.wait_for(["U1"]), ["info-U1"])
+        self.assertEqual(self.client.info_calls, ["U1"])
+        self.assertEqual(self.client.list_calls, 1)
+
+    def test_many_misses_are_filled_from_users_list(self):
+        user_ids = [f"U{i}" for i in range(IdentityCache.INFO_LOOKUPS * 4)]
+        self.client.members = [user(user_id) for user_id in user_ids]
+        self.cache.start()
+        with self.cache._cond:
+            for user_id in user_ids:
+                self.cache.display_name(user_id)
+        self.assertEqual(self.wait_for(user_ids), [f"list-{user_id}" for user_id in user_ids])
+        self.assertEqual(self.client.info_calls, [])
+        self.assertEqual(self.client.list_calls, 2)
+
+    def test_ids_missing_from_users_list_are_remembered_as_unknown(self):
+        self.cache.start()
+        user_ids = [f"U{i}" for i in range(IdentityCache.INFO_LOOKUPS * 4)]
+        with self.cache._cond:
+            for user_id in user_ids:
+                self.cache.display_name(user_id)
+        deadline = time.time() + 5
+        while self.cache._misses or len(self.cache._users) < len(user_ids):
+            self.assertLess(time.time(), deadline)
+            time.sleep(0.01)
+        self.assertIsNone(self.cache.display_name("U0"))
+        self.assertEqual(self.client.info_calls, [])
+        self.assertEqual(self.client.list_calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Replies of Plugin.reflector_handler to Slack's Events API deliveries.
+
+Indigo provides the `indigo` module to plugins at runtime; a minimal stand-in is installed
+so that plugin.py can be imported outside of the Indigo server.
+
+    python -m pytest tests
+"""
+
+import builtins
+import json
+import logging
+import os
+import sys
+import types
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "Slack2.indigoPlugin", "Contents", "Server Plugin"))
+
+if not hasattr(builtins, "indigo"):
+    builtins.indigo = types.SimpleNamespace(PluginBase=object)
+
+from event_dedup import EventDeduplicator  # noqa: E402
+from plugin import Plugin  # noqa: E402
+
+
+class FakeEventPipeline:
+    def __init__(self, accepts):
+        self.accepts = accepts
+        self.submitted = []
+
+    def submit(self, devId, event):
+        if self.accepts:
+            self.submitted.append((devId, event))
+        return self.accepts
+
+
+def reply_status(reply):
+    # a bare string is sent as the content of a 200 reply
+    return reply["status"] if isinstance(reply, dict) else 200
+
+
+class TestReflectorHandler(unittest.TestCase):
+    def setUp(self):
+        self.plugin = Plugin.__new__(Plugin)
+        logger = logging.getLogger("test_reflector_handler")
+        logger.threaddebug = logger.debug
+        self.plugin.logger = logger
+        self.plugin.slack_accounts = {"T111": 123}
+        self.plugin.event_dedup = EventDeduplicator()
+
+    def deliver(self, event_id="Ev111", headers=None):
+        body = {
+            "type": "event_callback",
+            "team_id": "T111",
+            "event_id": event_id,
+            "event": {"type": "message", "channel": "C111", "text": "hello"},
+        }
+        action = types.SimpleNamespace(props={"request_body": json.dumps(body), "headers": headers or {}})
+        return self.plugin.reflector_handler(action)
+
+    def test_queued_event_is_acknowledged(self):
+        self.plugin.event_pipeline = FakeEventPipeline(accepts=True)
+        self.assertEqual(reply_status(self.deliver()), 200)
+        self.assertEqual(len(self.plugin.event_pipeline.submitted), 1)
+
+    def test_full_queue_replies_with_an_error_status(self):
+        self.plugin.event_pipeline = FakeEventPipeline(accepts=False)
+        reply = self.deliver()
+        self.assertEqual(reply_status(reply), 503)
+        self.assertIn("Retry-After", reply["headers"])
+
+    def test_retry_after_a_full_queue_is_not_a_duplicate(self):
+        self.plugin.event_pipeline = FakeEventPipeline(accepts=False)
+        self.assertEqual(reply_status(self.deliver()), 503)
+        self.plugin.event_pipeline = FakeEventPipeline(accepts=True)
+        self.assertEqual(reply_status(self.deliver()), 200)
+        self.assertEqual(len(self.plugin.event_pipeline.submitted), 1)
+        # a later redelivery of the queued event is dropped
+        retry_headers = {"X-Slack-Retry-Num": "2", "X-Slack-Retry-Reason": "http_timeout"}
+        self.assertEqual(reply_status(self.deliver(headers=retry_headers)), 200)
+        self.assertEqual(len(self.plugin.event_pipeline.submitted), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()